@@ -0,0 +1,275 @@
+"""
+Incremental builds for generate_assets.py and downscale_assets.py.
+
+Every generator and every downscaled sprite is a node. A node's inputs
+are fingerprints, each naming what it covers:
+
+    generate_assets.generate_tank   source of the function that draws it
+    generate_assets.fill_rect       ... and of every function, class and
+    generate_assets.PALETTE         module-level value it reaches in this
+    generate_assets.SWARM_BODY      project (constants, compiled stencils, ...),
+    optimize_png.encode             save() included
+    frame idle_0                    sha256 of a source frame
+    config, options                 its SPRITES/registry entry, CLI options
+
+The build state (.cache/build-state.json) keeps each node's inputs, the
+manifest entries it wrote and the size/mtime of its files. A node is
+rebuilt when an input differs or one of its files is missing or was
+changed by something else; everything else is skipped and its recorded
+manifest entries are carried over. Source frames are only re-hashed when
+their size or mtime changed, so a no-op run is a few stats per frame.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import types
+
+import numpy as np
+
+from asset_manifest import entry_files
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(ROOT, ".cache", "build-state.json")
+
+# Output locations and per-run state: sinks and the options input cover
+# them, paths would make every checkout look different and caches fill up
+# differently depending on what ran before. A generator's GENERATORS entry
+# comes from its decorator, which is part of its source.
+IGNORED_GLOBALS = {
+    "ROOT",
+    "BASE",
+    "ASSETS_DIR",
+    "MANIFEST_PATH",
+    "CACHE_DIR",
+    "FRAMES_DIR",
+    "STATE_PATH",
+    "SAVE_OPTIONS",
+    "MANIFEST_ENTRIES",
+    "GENERATORS",
+    "SINK",
+    "PROFILER",
+    "NO_PROFILE",
+    "_STENCILS",
+}
+
+PLAIN_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def digest(data):
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def options_digest(options):
+    return digest(json.dumps(options, sort_keys=True, default=repr))
+
+
+# ─── Code fingerprints ───────────────────────────────────────────────
+
+
+def _module_name(obj):
+    module = inspect.getmodule(obj)
+    path = getattr(module, "__file__", None)
+    if not path or os.path.dirname(os.path.abspath(path)) != ROOT:
+        return None
+    # Not module.__name__: that is "__main__" when run as a script
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _is_code(value):
+    return inspect.isfunction(value) or inspect.isclass(value) or inspect.ismodule(value)
+
+
+def _canonical(value):
+    """Text that changes exactly when a module-level value does: sets in
+    sorted order, arrays by content, this project's objects by their
+    attributes and anything else by a repr without memory addresses."""
+    if isinstance(value, PLAIN_TYPES):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{', '.join(map(_canonical, value))}]"
+    if isinstance(value, (set, frozenset)):
+        return f"set[{', '.join(sorted(map(_canonical, value)))}]"
+    if isinstance(value, dict):
+        return f"dict[{', '.join(f'{_canonical(k)}: {_canonical(v)}' for k, v in value.items())}]"
+    if isinstance(value, np.ndarray):
+        return f"array[{value.dtype}, {value.shape}, {digest(np.ascontiguousarray(value).tobytes())}]"
+    if _is_code(value):
+        # Functions and classes are fingerprinted by source on their own
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', value.__name__)}"
+    if _module_name(type(value)) and hasattr(value, "__dict__"):
+        return f"{type(value).__qualname__}({_canonical(vars(value))})"
+    text = repr(value)
+    return type(value).__qualname__ if " at 0x" in text else text
+
+
+def _ref(module, name, value):
+    """What _own_print() records for a name: functions and classes are
+    followed, any other value is fingerprinted as module.name."""
+    if inspect.isfunction(value) or inspect.isclass(value):
+        return value
+    return (module, name, value)
+
+
+def _code_names(code):
+    """Global and attribute names used by a code object and its nested
+    functions, lambdas and comprehensions."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def _own_print(obj):
+    """(key, digest of obj's own source, [project objects it refers to])."""
+    module = _module_name(obj)
+    key = f"{module}.{obj.__qualname__}"
+    fns = [obj] if inspect.isfunction(obj) else [v for v in vars(obj).values() if inspect.isfunction(v)]
+    refs = []
+    for fn in fns:
+        scope = fn.__globals__
+        for name in sorted(_code_names(fn.__code__)):
+            if name in IGNORED_GLOBALS or name not in scope:
+                continue
+            value = scope[name]
+            if isinstance(value, types.ModuleType):
+                # "pixel_canvas.stencil": the attribute is among the names
+                if _module_name(value):
+                    refs.extend(
+                        _ref(_module_name(value), n, getattr(value, n))
+                        for n in _code_names(fn.__code__)
+                        if n not in IGNORED_GLOBALS and hasattr(value, n)
+                    )
+            else:
+                refs.append(_ref(_module_name(fn), name, value))
+        for name, cell in zip(fn.__code__.co_freevars, fn.__closure__ or ()):
+            refs.append(_ref(_module_name(fn), f"{fn.__qualname__}.{name}", cell.cell_contents))
+    return key, digest(inspect.getsource(obj)), refs
+
+
+def code_fingerprints(fn):
+    """{"module.name": digest} for fn and every function, class and
+    module-level value of this project it reaches, directly or not."""
+    prints = {}
+    todo = [fn]
+    seen = set()
+    while todo:
+        obj = todo.pop()
+        if isinstance(obj, tuple):
+            module, name, value = obj
+            if module and not isinstance(value, types.ModuleType):
+                prints[f"{module}.{name}"] = digest(_canonical(value))
+                # A Stencil's compiled state comes from its class's code
+                todo.append(type(value))
+            continue
+        if not (inspect.isfunction(obj) or inspect.isclass(obj)) or obj in seen or not _module_name(obj):
+            continue
+        seen.add(obj)
+        key, own, refs = _own_print(obj)
+        prints[key] = own
+        todo.extend(refs)
+    return prints
+
+
+# ─── Build state ─────────────────────────────────────────────────────
+
+
+class BuildState:
+    def __init__(self, path=None):
+        self.path = path or STATE_PATH
+        self.nodes = {}
+        self.files = {}  # source path -> [mtime_ns, size, sha256]
+        self._updated = {}
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            if state.get("version") == 1:
+                self.nodes, self.files = state["nodes"], state["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def source_digest(self, path):
+        """sha256 of a source file, re-hashed only if its size or mtime changed."""
+        key = os.path.abspath(path)
+        st = os.stat(path)
+        known = self.files.get(key)
+        if known and known[:2] == [st.st_mtime_ns, st.st_size]:
+            return known[2]
+        sha = file_sha256(path)
+        self.files[key] = [st.st_mtime_ns, st.st_size, sha]
+        return sha
+
+    def stale(self, node, inputs):
+        """Why node has to be rebuilt; empty when it is up to date."""
+        record = self.nodes.get(node)
+        if record is None:
+            return ["not built yet"]
+        old = record["inputs"]
+        changed = sorted(k for k in inputs.keys() | old.keys() if inputs.get(k) != old.get(k))
+        reasons = [f"changed: {', '.join(changed)}"] if changed else []
+        for path, (mtime_ns, size, sha) in record["outputs"].items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                reasons.append(f"{os.path.relpath(path, ROOT)} missing")
+                continue
+            if [st.st_mtime_ns, st.st_size] != [mtime_ns, size]:
+                if st.st_size != size or file_sha256(path) != sha:
+                    reasons.append(f"{os.path.relpath(path, ROOT)} modified")
+        return reasons
+
+    def entries(self, node):
+        """Manifest entries the last build of node wrote."""
+        return self.nodes.get(node, {}).get("entries", {})
+
+    def record(self, node, inputs, root, entries):
+        """Record a successful build of node that wrote entries (manifest
+        entries, file paths relative to root)."""
+        outputs = {}
+        for file in (f for entry in entries.values() for f in entry_files(entry)):
+            path = os.path.abspath(os.path.join(root, file["file"]))
+            st = os.stat(path)
+            outputs[path] = [st.st_mtime_ns, st.st_size, file["hash"]]
+        self.nodes[node] = self._updated[node] = {"inputs": inputs, "outputs": outputs, "entries": entries}
+
+    def save(self):
+        """Merge this run's nodes into the state file (written atomically),
+        so the two scripts can keep one state between them."""
+        disk = BuildState(self.path)
+        disk.nodes.update(self._updated)
+        disk.files.update(self.files)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "nodes": disk.nodes, "files": disk.files}, f)
+        os.replace(tmp, self.path)
+        self._updated = {}
+
+
+def node_name(script, name, root):
+    """State key of one script's target written under root; the same
+    sprite built into two folders is two nodes."""
+    return f"{script}:{name}@{os.path.relpath(root, ROOT)}"
+
+
+def print_plan(plan, label):
+    """Print a {name: reasons} plan, stale nodes first."""
+    stale = {name: reasons for name, reasons in plan.items() if reasons}
+    for name, reasons in stale.items():
+        print(f"  rebuild {name}: {'; '.join(reasons)}")
+    if len(stale) < len(plan):
+        print(f"  up to date: {len(plan) - len(stale)} {label}")
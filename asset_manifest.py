@@ -0,0 +1,196 @@
+"""
+assets/manifest.json, shared by generate_assets.py and downscale_assets.py.
+
+Every PNG either script writes is recorded under its Phaser texture key
+with a content hash, a content-hashed file name for immutable caching,
+its byte size and pixel size, the frame grid of spritesheets and the
+animation ranges implied by frame names (idle_0..idle_3 -> "idle": 0-3).
+Deduplicated sheets also carry "remap": logical frame -> stored cell
+(see sprite_frames.py); animation ranges stay in logical frames. Trimmed
+images carry "spriteSourceSize" (where the stored pixels sit) and
+"sourceSize" (the untrimmed size), as in a Phaser atlas frame. Pixel art
+written at native resolution (generate_assets.py --native) carries the
+integer "scale" to draw it at with nearest filtering; its sizes, frame
+grid and offsets are all in native pixels. Images also written as
+lossless WebP/AVIF (--formats) list them under "variants" with their
+own file, hashed name, hash and bytes; only formats smaller than the
+PNG are written, so a loader can take the first variant the browser
+decodes and fall back to "file".
+compress_textures.py adds "compressed": the KTX2 block-compressed copies
+(bc1, bc3, etc2) with their padded size and PSNR; writing a PNG with
+different content drops the section until the textures are compressed
+again. Each run merges its entries into the existing manifest, so running
+one script leaves the other's entries alone, and an entry whose PNG hash
+is unchanged keeps the sections it doesn't set itself. With --hashed the scripts also
+write the hashed copies next to the originals. Runs that write into an
+archive (--out assets.zip) put a manifest of just that run in it.
+
+    "enemy-swarm": {
+      "file": "enemies/swarm.png",
+      "hashed": "enemies/swarm.3f2a91c0.png",
+      "hash": "3f2a91c0...",
+      "bytes": 1234,
+      "width": 24,
+      "height": 24,
+      "source": "downscale_assets"
+    }
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from asset_sinks import DirectorySink
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), "apps", "web", "public", "assets")
+MANIFEST_PATH = os.path.join(ASSETS_DIR, "manifest.json")
+HASH_LENGTH = 8
+
+
+def animation_ranges(frame_names):
+    """{"idle": {"start": 0, "end": 3}, ...} for strip frames named
+    <animation>_<n>; only the first consecutive run of a prefix counts."""
+    ranges = {}
+    for i, name in enumerate(frame_names):
+        prefix, sep, n = name.rpartition("_")
+        if not sep or not n.isdigit():
+            continue
+        run = ranges.get(prefix)
+        if run is None:
+            ranges[prefix] = {"start": i, "end": i}
+        elif run["end"] == i - 1:
+            run["end"] = i
+    return ranges
+
+
+def hashed_name(rel_path, digest):
+    stem, ext = os.path.splitext(rel_path)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def variant_path(rel_path, fmt):
+    """Where the fmt variant of the PNG at rel_path is written."""
+    return f"{os.path.splitext(rel_path)[0]}.{fmt}"
+
+
+def file_entry(rel_path, data):
+    digest = hashlib.sha256(data).hexdigest()
+    return {
+        "file": rel_path.replace(os.sep, "/"),
+        "hashed": hashed_name(rel_path, digest).replace(os.sep, "/"),
+        "hash": digest,
+        "bytes": len(data),
+    }
+
+
+def make_entry(
+    rel_path, data, size, source, frame=None, frame_names=None, remap=None, trim=None, scale=1, variants=None
+):
+    """Manifest entry for data (the PNG bytes) written to rel_path under
+    ASSETS_DIR. frame is the (w, h) cell size of a spritesheet, remap the
+    logical -> stored frame list of a deduplicated one, trim the
+    (x, y, source_w, source_h) of a trimmed image, scale the integer
+    factor pixel art written at native resolution should be drawn at and
+    variants {format: bytes} of the other encodings written next to it."""
+    width, height = size
+    entry = {
+        **file_entry(rel_path, data),
+        "width": width,
+        "height": height,
+        "source": source,
+    }
+    if frame:
+        fw, fh = frame
+        entry["frame"] = {"width": fw, "height": fh, "count": (width // fw) * (height // fh)}
+    if remap and remap != list(range(len(remap))):
+        entry["remap"] = remap
+    if trim and tuple(trim[2:]) != (width, height):
+        x, y, source_w, source_h = trim
+        entry["spriteSourceSize"] = {"x": x, "y": y, "w": width, "h": height}
+        entry["sourceSize"] = {"w": source_w, "h": source_h}
+    if scale != 1:
+        entry["scale"] = scale
+    if variants:
+        entry["variants"] = {fmt: file_entry(variant_path(rel_path, fmt), v) for fmt, v in variants.items()}
+    animations = animation_ranges(frame_names or [])
+    if animations:
+        entry["animations"] = animations
+    return entry
+
+
+def entry_files(entry):
+    """The file entries (PNG first, then variants and compressed textures)
+    of a manifest entry."""
+    return [entry, *entry.get("variants", {}).values(), *entry.get("compressed", {}).values()]
+
+
+def _write_hashed(entry, assets_dir):
+    """Copy each file to its hashed name and drop stale hashed copies."""
+    for file in entry_files(entry):
+        src = os.path.join(assets_dir, file["file"])
+        dst = os.path.join(assets_dir, file["hashed"])
+        if not os.path.isfile(dst):
+            shutil.copyfile(src, dst)
+        stem, ext = os.path.splitext(os.path.basename(file["file"]))
+        stale = re.compile(rf"{re.escape(stem)}\.[0-9a-f]{{{HASH_LENGTH}}}{re.escape(ext)}$")
+        folder = os.path.dirname(dst)
+        for fn in os.listdir(folder):
+            if stale.match(fn) and fn != os.path.basename(dst):
+                os.remove(os.path.join(folder, fn))
+
+
+def _remove_files(entry, assets_dir, keep):
+    """Delete an entry's files and their hashed copies, except paths in keep."""
+    for file in entry_files(entry):
+        for rel in (file["file"], file.get("hashed")):
+            if rel and rel not in keep and os.path.isfile(os.path.join(assets_dir, rel)):
+                os.remove(os.path.join(assets_dir, rel))
+
+
+def update_manifest(entries, path=MANIFEST_PATH, hashed=False, drop=()):
+    """Merge {key: entry} into the manifest at path (written atomically).
+    Keys in drop, outputs a run no longer builds, are removed along with
+    their files."""
+    manifest = {"version": 1, "assets": {}}
+    try:
+        with open(path) as f:
+            existing = json.load(f)
+        if existing.get("version") == 1:
+            manifest = existing
+    except (OSError, ValueError):
+        pass
+    assets = manifest["assets"]
+    for key, entry in entries.items():
+        old = assets.get(key, {})
+        # Sections other tools added ("compressed") still describe this PNG
+        kept = {k: v for k, v in old.items() if k not in entry} if old.get("hash") == entry["hash"] else {}
+        assets[key] = {**kept, **entry}
+    gone = [assets.pop(key) for key in drop if key not in entries and key in assets]
+    keep = {f[k] for entry in assets.values() for f in entry_files(entry) for k in ("file", "hashed") if k in f}
+    for entry in gone:
+        _remove_files(entry, os.path.dirname(path), keep)
+        print(f"  manifest: removed {entry['file']} (no longer built)")
+    if hashed:
+        for entry in entries.values():
+            _write_hashed(entry, os.path.dirname(path))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+    print(f"  manifest: {path} ({len(entries)} updated, {len(manifest['assets'])} total)")
+
+
+def write_manifest(entries, sink, hashed=False, drop=()):
+    """update_manifest() into a DirectorySink's folder; any other sink
+    gets a manifest of entries alone."""
+    if isinstance(sink, DirectorySink):
+        update_manifest(entries, os.path.join(sink.root, "manifest.json"), hashed, drop)
+        return
+    manifest = {"version": 1, "assets": entries}
+    sink.write("manifest.json", (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode())
+    print(f"  manifest: {sink.location('manifest.json')} ({len(entries)} entries)")
@@ -0,0 +1,160 @@
+"""
+Per-sprite, per-stage profiling for the asset scripts (--profile).
+
+Each stage (decode, resize, assemble, encode, write, ...) records its wall
+time, the CPU time of the thread that ran it and the bytes it allocated:
+the peak Python/NumPy heap growth seen by tracemalloc, plus the Pillow
+pixel buffers the stage reports itself (Pillow allocates those outside
+the Python heap, so tracemalloc never sees them). Stages may nest; with
+several threads profiling at once the heap figures are approximate.
+
+Worker processes profile into their own Profiler and send the events back
+with their results. Events can be printed as a summary table sorted by
+wall time, or written as Chrome trace-event JSON for chrome://tracing,
+Perfetto or speedscope.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+def image_bytes(img):
+    """Size of a Pillow image's pixel buffer."""
+    return img.width * img.height * len(img.getbands())
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._local = threading.local()
+
+    def start(self):
+        self.enabled = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, item, name):
+        """Time the body as stage `name` of `item` (a sprite or asset name).
+
+        Yields the event dict; add to its "bytes" for buffers allocated
+        outside the Python heap.
+        """
+        event = {"item": item, "stage": name, "bytes": 0}
+        if not self.enabled:
+            yield event
+            return
+
+        # tracemalloc has one global peak: fold it into the enclosing
+        # stage before resetting it for this one.
+        stack = self._local.__dict__.setdefault("stack", [])
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+        frame = {"base": current, "peak": current}
+        stack.append(frame)
+
+        start, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield event
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu
+            stack.pop()
+            peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            event.update(
+                bytes=event["bytes"] + peak - frame["base"],
+                start=start,
+                wall=wall,
+                cpu=cpu,
+                pid=os.getpid(),
+                tid=threading.get_native_id(),
+            )
+            self.events.append(event)
+
+
+# Shared disabled instance for callers that don't profile
+NO_PROFILE = Profiler()
+
+
+# ─── Reports ─────────────────────────────────────────────────────────
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def print_summary(events, limit=40):
+    """Print per (item, stage) and per-stage totals, slowest first."""
+    if not events:
+        return
+    rows = {}
+    stages = {}
+    for e in events:
+        for table, key in ((rows, (e["item"], e["stage"])), (stages, e["stage"])):
+            row = table.setdefault(key, [0, 0.0, 0.0, 0])
+            row[0] += 1
+            row[1] += e["wall"]
+            row[2] += e["cpu"]
+            row[3] += e["bytes"]
+
+    print(f"\nProfile ({len(events)} stage events):")
+    print(f"  {'item':28} {'stage':10} {'n':>4} {'wall ms':>9} {'cpu ms':>9} {'alloc':>10}")
+    ranked = sorted(rows.items(), key=lambda kv: kv[1][1], reverse=True)
+    for (item, stage), (n, wall, cpu, alloc) in ranked[:limit]:
+        print(f"  {item:28} {stage:10} {n:4} {wall * 1000:9.1f} {cpu * 1000:9.1f} {format_bytes(alloc):>10}")
+    if len(ranked) > limit:
+        print(f"  ... {len(ranked) - limit} more")
+
+    print(f"\n  {'stage':39} {'n':>4} {'wall ms':>9} {'cpu ms':>9} {'alloc':>10}")
+    for stage, (n, wall, cpu, alloc) in sorted(stages.items(), key=lambda kv: kv[1][1], reverse=True):
+        print(f"  {stage:39} {n:4} {wall * 1000:9.1f} {cpu * 1000:9.1f} {format_bytes(alloc):>10}")
+
+
+def write_trace(events, path, process_name="main"):
+    """Write events as Chrome trace-event JSON ("X" complete events).
+
+    perf_counter is a system-wide monotonic clock on the supported
+    platforms, so events from worker processes line up on one timeline.
+    """
+    if not events:
+        return
+    t0 = min(e["start"] for e in events)
+    main_pid = os.getpid()
+    trace = [
+        {
+            "name": "process_name",
+            "ph": "M",
+            "pid": pid,
+            "args": {"name": process_name if pid == main_pid else f"worker {pid}"},
+        }
+        for pid in sorted({e["pid"] for e in events})
+    ]
+    for e in sorted(events, key=lambda e: e["start"]):
+        trace.append(
+            {
+                "name": e["stage"],
+                "cat": e["item"],
+                "ph": "X",
+                "ts": round((e["start"] - t0) * 1e6, 1),
+                "dur": round(e["wall"] * 1e6, 1),
+                "pid": e["pid"],
+                "tid": e["tid"],
+                "args": {"item": e["item"], "cpu_ms": round(e["cpu"] * 1000, 3), "bytes": e["bytes"]},
+            }
+        )
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    print(f"  trace: {path} ({len(events)} events)")
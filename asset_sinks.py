@@ -0,0 +1,136 @@
+"""
+Where the asset scripts put the files they encode.
+
+A sink takes a path relative to the assets folder and the file's bytes.
+DirectorySink writes files, as the scripts always have; MemorySink keeps
+them in a dict for tests and in-process tooling; ZipSink and TarSink
+stream everything into one archive for build servers. open_sink() picks
+one from an --out argument.
+
+Archives are reproducible: entries get a fixed timestamp, so the same
+assets always produce the same archive bytes.
+"""
+
+import gzip
+import io
+import os
+import tarfile
+import threading
+import zipfile
+
+# Fixed entry timestamp for archives (the earliest a zip can record)
+ARCHIVE_DATE = (1980, 1, 1, 0, 0, 0)
+ARCHIVE_MTIME = 315532800
+
+
+def archive_name(rel_path):
+    return rel_path.replace(os.sep, "/")
+
+
+class Sink:
+    def location(self, rel_path):
+        """Human-readable place rel_path ends up, for log lines."""
+        raise NotImplementedError
+
+    def write(self, rel_path, data):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DirectorySink(Sink):
+    def __init__(self, root):
+        self.root = root
+
+    def location(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, data):
+        path = self.location(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+class MemorySink(Sink):
+    """{archive-style path: bytes}; prefix only changes what location() shows."""
+
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.files = {}
+
+    def location(self, rel_path):
+        return f"{self.prefix}{archive_name(rel_path)}"
+
+    def write(self, rel_path, data):
+        self.files[archive_name(rel_path)] = bytes(data)
+
+
+class ZipSink(Sink):
+    def __init__(self, path):
+        self.path = path
+        # PNGs are already deflated; storing them keeps the zip cheap to write
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED)
+        self._lock = threading.Lock()
+
+    def location(self, rel_path):
+        return f"{self.path}:{archive_name(rel_path)}"
+
+    def write(self, rel_path, data):
+        info = zipfile.ZipInfo(archive_name(rel_path), ARCHIVE_DATE)
+        info.external_attr = 0o644 << 16
+        with self._lock:
+            self._zip.writestr(info, data)
+
+    def close(self):
+        self._zip.close()
+
+
+class TarSink(Sink):
+    def __init__(self, path):
+        self.path = path
+        self._gzip = None
+        if path.endswith((".tar.gz", ".tgz")):
+            # tarfile's own "w:gz" stamps the gzip header with the current time
+            self._gzip = gzip.GzipFile(path, "wb", mtime=ARCHIVE_MTIME)
+            self._tar = tarfile.open(fileobj=self._gzip, mode="w")
+        else:
+            self._tar = tarfile.open(path, "w")
+        self._lock = threading.Lock()
+
+    def location(self, rel_path):
+        return f"{self.path}:{archive_name(rel_path)}"
+
+    def write(self, rel_path, data):
+        info = tarfile.TarInfo(archive_name(rel_path))
+        info.size = len(data)
+        info.mtime = ARCHIVE_MTIME
+        info.mode = 0o644
+        with self._lock:
+            self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self._tar.close()
+        if self._gzip:
+            self._gzip.close()
+
+
+def is_archive(out):
+    return out.endswith((".zip", ".tar", ".tar.gz", ".tgz"))
+
+
+def open_sink(out):
+    """Sink for an --out argument: a .zip, .tar, .tar.gz or .tgz path
+    writes that archive, anything else is a directory."""
+    if out.endswith(".zip"):
+        return ZipSink(out)
+    if is_archive(out):
+        return TarSink(out)
+    return DirectorySink(out)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Benchmark the asset pipeline and catch performance regressions.
+
+Cases:
+    generate/<name>                       every generate_assets generator
+    downscale/<sprite>/<filter>           every SPRITES entry with source art
+    synthetic/<px>x<frames>/<filter>/<size>
+                                          synthetic hi-res strips from the corpus
+
+Each case runs in a fresh process (so peak RSS is its own) and reports the
+median wall time, CPU time, peak RSS and throughput. Results are JSON and
+can be checked against a stored baseline.
+
+Usage:
+    python bench_assets.py                              # quick corpus, print table
+    python bench_assets.py --corpus full -o bench.json  # 1k-8k frames, hundreds per strip
+    python bench_assets.py -k "synthetic/*" --repeat 5
+    python bench_assets.py --baseline bench.json --tolerance 0.2   # exit 1 on regression
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from fnmatch import fnmatch
+
+import numpy as np
+import PIL
+from PIL import Image
+
+import downscale_assets
+import generate_assets
+from asset_sinks import DirectorySink
+
+ROOT = os.path.dirname(__file__)
+CORPUS_DIR = os.path.join(ROOT, ".cache", "bench-corpus")
+
+# (frame px, frames per strip) per corpus preset
+CORPORA = {
+    "quick": [(1024, 8)],
+    "standard": [(1024, 64), (2048, 16), (4096, 4)],
+    "full": [(1024, 256), (2048, 128), (4096, 32), (8192, 8)],
+}
+SYNTHETIC_FRAME_SIZES = [24, 128]
+
+
+# ─── Synthetic corpus ────────────────────────────────────────────────
+
+
+def synthetic_frame(px, seed):
+    """A smooth RGBA blob on transparency; compresses like painted art
+    rather than like noise, so decode cost is realistic."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (16, 16, 4), dtype=np.uint8)
+    yy, xx = np.mgrid[-1:1:16j, -1:1:16j]
+    small[:, :, 3] = np.where(xx * xx + yy * yy < 0.8, 255, 0)
+    return Image.fromarray(small).resize((px, px), Image.BICUBIC)
+
+
+def ensure_corpus(px, count):
+    """Folder of `count` distinct px-square frames named f_000.png, ... (cached)."""
+    folder = os.path.join(CORPUS_DIR, f"{px}")
+    os.makedirs(folder, exist_ok=True)
+    names = [f"f_{i:03d}" for i in range(count)]
+    for i, name in enumerate(names):
+        path = os.path.join(folder, f"{name}.png")
+        if not os.path.isfile(path):
+            synthetic_frame(px, seed=i).save(path)
+    return folder, names
+
+
+# ─── Cases ───────────────────────────────────────────────────────────
+
+
+def collect_cases(corpus):
+    cases = []
+    for name in generate_assets.GENERATORS:
+        cases.append({"name": f"generate/{name}", "kind": "generate", "generator": name})
+
+    for sprite, cfg in downscale_assets.SPRITES.items():
+        if not os.path.isdir(os.path.join(ROOT, cfg["src"])):
+            continue
+        for filt in downscale_assets.RESAMPLING_METHODS:
+            cases.append({"name": f"downscale/{sprite}/{filt}", "kind": "downscale", "cfg": cfg, "filter": filt})
+
+    for px, count in CORPORA[corpus]:
+        for filt in downscale_assets.RESAMPLING_METHODS:
+            for size in SYNTHETIC_FRAME_SIZES:
+                cases.append(
+                    {
+                        "name": f"synthetic/{px}x{count}/{filt}/{size}",
+                        "kind": "synthetic",
+                        "px": px,
+                        "count": count,
+                        "filter": filt,
+                        "frame_size": size,
+                    }
+                )
+    return cases
+
+
+def _case_cfg(case, out_dir):
+    """SPRITES-style config for a downscale or synthetic case, writing to out_dir."""
+    if case["kind"] == "downscale":
+        cfg = dict(case["cfg"])
+    else:
+        folder, names = ensure_corpus(case["px"], case["count"])
+        cfg = {"src": folder, "frame_size": case["frame_size"], "layout": "strip", "frames": names}
+    cfg["dst"] = os.path.join(out_dir, "out.png")
+    return cfg
+
+
+def _input_bytes(cfg):
+    src = os.path.join(ROOT, cfg["src"])
+    total = 0
+    for name in cfg["frames"]:
+        path = os.path.join(src, f"{name}.png")
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def run_case(case, repeat):
+    """Run one case `repeat` times in this process and return its metrics."""
+    out_dir = tempfile.mkdtemp(prefix="bench-")
+    sink = generate_assets.SINK
+    try:
+        if case["kind"] == "generate":
+            # Redirect save() away from the real asset tree
+            generate_assets.SINK = DirectorySink(out_dir)
+            fn = generate_assets.GENERATORS[case["generator"]]["fn"]
+            frames, in_bytes = 1, 0
+
+            def step():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fn()
+
+        else:
+            cfg = _case_cfg(case, out_dir)
+            resampling = downscale_assets.RESAMPLING_METHODS[case["filter"]]
+            frames, in_bytes = len(cfg["frames"]), _input_bytes(cfg)
+
+            def step():
+                if not downscale_assets.process_sprite("bench", cfg, resampling, log=lambda line: None):
+                    raise RuntimeError("process_sprite reported failure")
+
+        walls, cpus = [], []
+        for _ in range(repeat):
+            w0, c0 = time.perf_counter(), time.process_time()
+            step()
+            walls.append(time.perf_counter() - w0)
+            cpus.append(time.process_time() - c0)
+    finally:
+        generate_assets.SINK = sink
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    wall = statistics.median(walls)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    return {
+        "wall_s": wall,
+        "wall_min_s": min(walls),
+        "cpu_s": statistics.median(cpus),
+        "peak_rss_mb": round(rss_mb, 1),
+        "frames_per_s": frames / wall if wall else 0.0,
+        "mb_per_s": in_bytes / (1024 * 1024) / wall if wall else 0.0,
+    }
+
+
+def run_isolated(case, repeat):
+    """Run a case in a fresh spawned process so peak RSS is per case."""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_case, (case, repeat))
+
+
+# ─── Baseline comparison ─────────────────────────────────────────────
+
+
+def compare(results, baseline, tolerance):
+    """Return [(case, metric, base, now)] for every metric that got worse
+    than baseline by more than tolerance (a fraction, 0.1 = 10%)."""
+    regressions = []
+    for name, now in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            continue
+        for metric in ("wall_s", "peak_rss_mb"):
+            if base.get(metric) and now[metric] > base[metric] * (1 + tolerance):
+                regressions.append((name, metric, base[metric], now[metric]))
+    return regressions
+
+
+def print_table(results):
+    print(f"\n{'case':52} {'wall ms':>9} {'cpu ms':>9} {'rss MB':>8} {'frames/s':>9} {'MB/s':>8}")
+    for name, r in results["cases"].items():
+        print(
+            f"{name:52} {r['wall_s'] * 1000:9.1f} {r['cpu_s'] * 1000:9.1f} {r['peak_rss_mb']:8.1f}"
+            f" {r['frames_per_s']:9.1f} {r['mb_per_s']:8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark asset generation and downscaling")
+    parser.add_argument("-k", dest="patterns", nargs="*", default=[], help="Only run cases matching these globs")
+    parser.add_argument("--corpus", choices=list(CORPORA), default="quick", help="Synthetic corpus preset")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is reported (default: 3)")
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown/growth (default: 0.15)")
+    parser.add_argument(
+        "--no-isolate",
+        action="store_true",
+        help="Run cases in this process (faster, but peak RSS is cumulative)",
+    )
+    parser.add_argument("--list", action="store_true", help="List cases and exit")
+    args = parser.parse_args()
+
+    cases = collect_cases(args.corpus)
+    if args.patterns:
+        cases = [c for c in cases if any(fnmatch(c["name"], p) for p in args.patterns)]
+    if args.list:
+        for case in cases:
+            print(case["name"])
+        return
+    if not cases:
+        print("Error: no benchmark case matches")
+        sys.exit(1)
+
+    # Build the corpus up front so its encode time never lands in a case
+    for case in cases:
+        if case["kind"] == "synthetic":
+            ensure_corpus(case["px"], case["count"])
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": args.corpus,
+            "repeat": args.repeat,
+        },
+        "cases": {},
+    }
+    runner = run_case if args.no_isolate else run_isolated
+    print(f"Running {len(cases)} benchmark case(s) (corpus={args.corpus}, repeat={args.repeat})...")
+    for case in cases:
+        results["cases"][case["name"]] = runner(case, args.repeat)
+        print(f"  {case['name']}: {results['cases'][case['name']]['wall_s'] * 1000:.1f} ms")
+
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for name, metric, base, now in regressions:
+                print(f"  {name} {metric}: {base:.4g} -> {now:.4g} (+{(now / base - 1):.0%})")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Collision shapes derived from the alpha channel of the sprites written by
+generate_assets.py and downscale_assets.py, so the game can give bodies
+tight cheap shapes instead of oversized defaults or per-pixel checks.
+
+For every texture, or every frame of a spritesheet, the pixels with
+alpha above --threshold give:
+
+    aabb     tight bounding box {x, y, w, h}
+    circle   minimal enclosing circle {x, y, r} of those pixels
+    hull     their convex hull as [[x, y], ...], simplified to at most
+             --max-vertices points by cutting off the smallest corners
+
+Coordinates are in the sprite's drawn pixels, origin at the top-left of
+the untrimmed frame: trimmed images are offset back by their
+spriteSourceSize and pixel art written at native size (--native) is
+scaled by its draw scale. Deduplicated sheets list every logical frame.
+Fully transparent frames get null. Shapes are written to
+assets/collision.json keyed by texture key; runs for some keys merge
+into the existing file.
+
+Usage:
+    python collision_shapes.py                      # every sprite
+    python collision_shapes.py "enemy-*" proj-knife # only matching texture keys
+    python collision_shapes.py --threshold 127      # ignore faint edge pixels
+    python collision_shapes.py --max-vertices 6     # coarser hulls
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from fnmatch import fnmatch
+
+import numpy as np
+from PIL import Image
+
+from asset_manifest import ASSETS_DIR, MANIFEST_PATH
+from pack_atlas import atlas_sources
+from sprite_frames import split_sheet
+
+OUT_PATH = os.path.join(ASSETS_DIR, "collision.json")
+
+
+# ─── Geometry ────────────────────────────────────────────────────────
+
+
+def solid_masks(frames, threshold=0):
+    """(F, h, w) bool: alpha > threshold for equally sized RGBA frames."""
+    return np.stack([np.asarray(f.convert("RGBA"))[:, :, 3] for f in frames]) > threshold
+
+
+def bounding_boxes(masks):
+    """(F, 4) int (x0, y0, x1, y1) of each mask's solid pixels (exclusive
+    end), all at once; rows of empty masks are -1."""
+    rows, cols = masks.any(2), masks.any(1)
+    h, w = masks.shape[1:]
+    boxes = np.stack(
+        [
+            cols.argmax(1),
+            rows.argmax(1),
+            w - cols[:, ::-1].argmax(1),
+            h - rows[:, ::-1].argmax(1),
+        ],
+        1,
+    )
+    boxes[~rows.any(1)] = -1
+    return boxes
+
+
+def outline_points(mask):
+    """Corners of the leftmost and rightmost solid pixel of every row:
+    their hull is the hull of all the solid pixel squares."""
+    rows = np.flatnonzero(mask.any(1))
+    solid = mask[rows]
+    left = solid.argmax(1)
+    right = mask.shape[1] - solid[:, ::-1].argmax(1)
+    xs = np.concatenate([left, left, right, right])
+    ys = np.concatenate([rows, rows + 1, rows, rows + 1])
+    return np.unique(np.stack([xs, ys], 1), axis=0)
+
+
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def convex_hull(points):
+    """Andrew's monotone chain over sorted integer points; no collinear
+    vertices, in order around the hull."""
+    points = [tuple(p) for p in points.tolist()]
+    if len(points) < 3:
+        return points
+    lower, upper = [], []
+    for chain, ordered in ((lower, points), (upper, points[::-1])):
+        for p in ordered:
+            while len(chain) >= 2 and _cross(chain[-2], chain[-1], p) <= 0:
+                chain.pop()
+            chain.append(p)
+    return lower[:-1] + upper[:-1]
+
+
+def simplify_hull(hull, max_vertices):
+    """Drop the vertex spanning the smallest triangle with its neighbours
+    until at most max_vertices remain (Visvalingam-Whyatt); on a convex
+    hull that cuts off the least area each time."""
+    hull = np.array(hull, np.int64)
+    while len(hull) > max(max_vertices, 3):
+        prev, nxt = np.roll(hull, 1, 0), np.roll(hull, -1, 0)
+        a, b = hull - prev, nxt - prev
+        area = np.abs(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0])
+        hull = np.delete(hull, area.argmin(), 0)
+    return hull.tolist()
+
+
+def _circle2(a, b):
+    x, y = (a[0] + b[0]) / 2, (a[1] + b[1]) / 2
+    return x, y, math.hypot(a[0] - x, a[1] - y)
+
+
+def _circle3(a, b, c):
+    d = 2 * (a[0] * (b[1] - c[1]) + b[0] * (c[1] - a[1]) + c[0] * (a[1] - b[1]))
+    sa, sb, sc = a[0] ** 2 + a[1] ** 2, b[0] ** 2 + b[1] ** 2, c[0] ** 2 + c[1] ** 2
+    x = (sa * (b[1] - c[1]) + sb * (c[1] - a[1]) + sc * (a[1] - b[1])) / d
+    y = (sa * (c[0] - b[0]) + sb * (a[0] - c[0]) + sc * (b[0] - a[0])) / d
+    return x, y, math.hypot(a[0] - x, a[1] - y)
+
+
+def _inside(circle, p):
+    return math.hypot(p[0] - circle[0], p[1] - circle[1]) <= circle[2] + 1e-9
+
+
+def enclosing_circle(points):
+    """Minimal enclosing circle (x, y, r) of the vertices of a convex hull
+    (no three collinear), by Welzl's incremental construction."""
+    circle = (points[0][0], points[0][1], 0.0)
+    for i, p in enumerate(points):
+        if _inside(circle, p):
+            continue
+        circle = (p[0], p[1], 0.0)
+        for j, q in enumerate(points[:i]):
+            if _inside(circle, q):
+                continue
+            circle = _circle2(p, q)
+            for r in points[:j]:
+                if not _inside(circle, r):
+                    circle = _circle3(p, q, r)
+    return circle
+
+
+def frame_shapes(mask, box, max_vertices, offset=(0, 0), scale=1):
+    """Shapes of one frame's solid mask, or None if it has no solid pixels."""
+    if box[0] < 0:
+        return None
+    ox, oy = offset
+    hull = convex_hull(outline_points(mask))
+    x, y, r = enclosing_circle(hull)
+    x0, y0, x1, y1 = (int(v) for v in box)
+    return {
+        "aabb": {"x": (x0 + ox) * scale, "y": (y0 + oy) * scale, "w": (x1 - x0) * scale, "h": (y1 - y0) * scale},
+        "circle": {"x": round((x + ox) * scale, 2), "y": round((y + oy) * scale, 2), "r": round(r * scale, 2)},
+        "hull": [[(px + ox) * scale, (py + oy) * scale] for px, py in simplify_hull(hull, max_vertices)],
+    }
+
+
+def texture_shapes(img, frame, recorded, threshold=0, max_vertices=8):
+    """Collision entry for one texture: its shapes, or per-frame shapes
+    for a spritesheet. recorded is its manifest entry (or {})."""
+    frames = split_sheet(img, frame) if frame else [img]
+    masks = solid_masks(frames, threshold)
+    boxes = bounding_boxes(masks)
+    scale = recorded.get("scale", 1)
+    trim = recorded.get("spriteSourceSize", {})
+    offset = (trim.get("x", 0), trim.get("y", 0))
+    shapes = [frame_shapes(m, b, max_vertices, offset, scale) for m, b in zip(masks, boxes)]
+
+    source = recorded.get("sourceSize")
+    width, height = (source["w"], source["h"]) if source else frames[0].size
+    entry = {"width": width * scale, "height": height * scale, "threshold": threshold}
+    if frame:
+        remap = recorded.get("remap") or list(range(len(shapes)))
+        entry["frames"] = [shapes[cell] for cell in remap]
+    else:
+        entry.update(shapes[0] or {"aabb": None, "circle": None, "hull": None})
+    return entry
+
+
+# ─── Output ──────────────────────────────────────────────────────────
+
+
+def update_shapes(entries, path=OUT_PATH):
+    """Merge {key: entry} into the shapes file at path (written atomically)."""
+    shapes = {"version": 1, "shapes": {}}
+    try:
+        with open(path) as f:
+            existing = json.load(f)
+        if existing.get("version") == 1:
+            shapes = existing
+    except (OSError, ValueError):
+        pass
+    shapes["shapes"].update(entries)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(shapes, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+    print(f"  shapes: {path} ({len(entries)} updated, {len(shapes['shapes'])} total)")
+
+
+def describe(entry):
+    shapes = [s for s in entry.get("frames", [entry]) if s and s["aabb"]]
+    if not shapes:
+        return "fully transparent"
+    area = entry["width"] * entry["height"]
+    box = max(s["aabb"]["w"] * s["aabb"]["h"] for s in shapes)
+    radius = max(s["circle"]["r"] for s in shapes)
+    vertices = max(len(s["hull"]) for s in shapes)
+    frames = f"{len(entry['frames'])} frames, " if "frames" in entry else ""
+    return f"{frames}aabb up to {box / area:.0%} of the frame, r <= {radius:g}, hull <= {vertices} vertices"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake alpha-derived collision shapes for the sprites")
+    parser.add_argument("keys", nargs="*", help="Texture keys or globs (default: all)")
+    parser.add_argument("--threshold", type=int, default=0, help="Alpha at or below this is empty (default: 0)")
+    parser.add_argument(
+        "--max-vertices",
+        type=int,
+        default=8,
+        help="Simplify hulls to at most this many vertices (default: 8, minimum 3)",
+    )
+    parser.add_argument("--out", default=OUT_PATH, help="Shapes JSON to update (default: assets/collision.json)")
+    args = parser.parse_args()
+
+    if not 0 <= args.threshold < 255:
+        print(f"Error: --threshold must be 0-254, got {args.threshold}")
+        sys.exit(1)
+    if args.max_vertices < 3:
+        print(f"Error: --max-vertices must be at least 3, got {args.max_vertices}")
+        sys.exit(1)
+
+    sources = atlas_sources()
+    keys = [k for k in sources if not args.keys or any(fnmatch(k, p) for p in args.keys)]
+    if not keys:
+        print(f"Error: no texture key matches: {', '.join(args.keys)}")
+        print(f"Available: {', '.join(sources)}")
+        sys.exit(1)
+
+    try:
+        with open(MANIFEST_PATH) as f:
+            recorded = json.load(f).get("assets", {})
+    except (OSError, ValueError):
+        recorded = {}
+
+    print(f"Baking collision shapes (threshold={args.threshold}, max-vertices={args.max_vertices})...")
+    entries = {}
+    for key in keys:
+        src = sources[key]
+        if not os.path.isfile(src["path"]):
+            print(f"  SKIP {key}: not built yet ({src['path']})")
+            continue
+        img = Image.open(src["path"])
+        entries[key] = texture_shapes(img, src["frame"], recorded.get(key, {}), args.threshold, args.max_vertices)
+        print(f"  {key}: {describe(entries[key])}")
+
+    if not entries:
+        print("Error: nothing to analyse")
+        sys.exit(1)
+    update_shapes(entries, args.out)
+    print(f"\nDone: {len(entries)} texture(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+"""
+GPU block-compressed copies of the sprites written by generate_assets.py
+and downscale_assets.py, as KTX2 files next to each PNG.
+
+A PNG is only small on the wire: the GPU holds it as RGBA8, 4 bytes per
+pixel. Block-compressed textures stay compressed in GPU memory:
+
+    bc1    BC1/DXT1 with 1-bit alpha   0.5 B/pixel   desktop (S3TC)
+    bc3    BC3/DXT5                    1 B/pixel     desktop (S3TC)
+    etc2   ETC2 RGBA8 (EAC alpha)      1 B/pixel     phones (OpenGL ES 3 / WebGL 2)
+
+Each 4x4 block is encoded on its own, many blocks at a time with NumPy.
+BC endpoints are searched among the bounding-box diagonal (inset and not)
+and a least-squares fit to the chosen indices; ETC2 colors try both
+sub-block splits in individual and differential mode with every intensity
+table, EAC alpha every table with the multipliers that span the block.
+Only ETC1-compatible color modes are written (no T, H or planar blocks).
+Everything is integer arithmetic, so the output is byte-identical on
+every machine. Images are padded with transparent pixels to a multiple
+of 4; the KTX2 records the padded size.
+
+The report lists bytes and PSNR against the PNG per texture and format.
+PSNR is over premultiplied RGBA, so colors under transparent pixels don't
+count. Textures in the manifest get a "compressed" section listing each
+KTX2 with its size and PSNR.
+
+Usage:
+    python compress_textures.py                     # bc3 + etc2 for every sprite
+    python compress_textures.py "enemy-*" player    # only matching texture keys
+    python compress_textures.py --formats bc1 bc3 etc2
+    python compress_textures.py --json report.json  # also write the report as JSON
+"""
+
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+from fnmatch import fnmatch
+
+import numpy as np
+from PIL import Image
+
+from asset_manifest import ASSETS_DIR, MANIFEST_PATH, file_entry, update_manifest
+from pack_atlas import atlas_sources
+
+# Blocks encoded per NumPy batch; bounds the (blocks x candidates x texels)
+# temporaries. The EAC alpha search has far more candidates per block.
+BATCH = 2048
+EAC_BATCH = 256
+
+
+# ─── Blocks ──────────────────────────────────────────────────────────
+
+
+def to_blocks(img):
+    """(blocks, (width, height)): the (N, 16, 4) int64 RGBA texels of each
+    4x4 block, blocks and texels row-major, and the padded image size."""
+    rgba = np.asarray(img.convert("RGBA"))
+    h, w = rgba.shape[:2]
+    pw, ph = -(-w // 4) * 4, -(-h // 4) * 4
+    padded = np.zeros((ph, pw, 4), np.int64)
+    padded[:h, :w] = rgba
+    blocks = padded.reshape(ph // 4, 4, pw // 4, 4, 4).swapaxes(1, 2).reshape(-1, 16, 4)
+    return blocks, (pw, ph)
+
+
+def from_blocks(blocks, size):
+    """Inverse of to_blocks(): an RGBA image of the padded size."""
+    pw, ph = size
+    pixels = blocks.reshape(ph // 4, pw // 4, 4, 4, 4).swapaxes(1, 2).reshape(ph, pw, 4)
+    return Image.fromarray(pixels.astype(np.uint8), "RGBA")
+
+
+def _encode(blocks, encode_batch, byte_order):
+    """Bytes of blocks encoded BATCH at a time by encode_batch, which maps
+    (M, 16, 4) texels to (M, words) uint64. Fully transparent blocks, most
+    of a sprite, share one encoding."""
+    clear = blocks[:, :, 3].max(1) == 0
+    empty = encode_batch(np.zeros((1, 16, 4), np.int64))
+    out = np.empty((len(blocks), empty.shape[1]), np.uint64)
+    out[clear] = empty
+    rest = np.flatnonzero(~clear)
+    for start in range(0, len(rest), BATCH):
+        batch = rest[start : start + BATCH]
+        out[batch] = encode_batch(blocks[batch])
+    return out.astype(byte_order).tobytes()
+
+
+def _keep_better(best, new, better):
+    """Per block, new where better else best, for lists of (N, ...) arrays."""
+    return [np.where(better.reshape(-1, *[1] * (b.ndim - 1)), n, b) for b, n in zip(best, new)]
+
+
+def _pack_bits(indices, shifts):
+    """OR indices[:, i] << shifts[i] into one uint64 per block."""
+    return np.bitwise_or.reduce(indices.astype(np.uint64) << np.asarray(shifts, np.uint64), axis=1)
+
+
+# ─── BC1 / BC3 ───────────────────────────────────────────────────────
+
+# Weight of the first endpoint (in thirds / halves) of each color index
+BC_WEIGHTS4 = np.array([3, 0, 2, 1])
+BC_WEIGHTS3 = np.array([2, 0, 1, 0])
+BC_SHIFTS = [2 * i for i in range(16)]
+BC3_ALPHA_SHIFTS = [16 + 3 * i for i in range(16)]
+
+
+def _pack565(rgb):
+    rgb = np.clip(rgb, 0, 255)
+    r = (rgb[..., 0] * 31 + 127) // 255
+    g = (rgb[..., 1] * 63 + 127) // 255
+    b = (rgb[..., 2] * 31 + 127) // 255
+    return (r << 11) | (g << 5) | b
+
+
+def _expand565(c):
+    r, g, b = (c >> 11) & 31, (c >> 5) & 63, c & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], -1)
+
+
+def _bc_palette(c0, c1, three):
+    """(N, 4, 3) colors of packed 565 endpoints; three-color blocks have
+    their midpoint at index 2 and transparent black at 3."""
+    e0, e1 = _expand565(c0), _expand565(c1)
+    four = np.stack([e0, e1, (2 * e0 + e1) // 3, (e0 + 2 * e1) // 3], 1)
+    tri = np.stack([e0, e1, (e0 + e1) // 2, np.zeros_like(e0)], 1)
+    return np.where(three[:, None, None], tri, four)
+
+
+def _bc_fit(rgb, weights, c0, c1, three):
+    """(indices, error) of the nearest palette color per texel."""
+    palette = _bc_palette(c0, c1, three)
+    dist = ((rgb[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(-1)
+    # Index 3 of a three-color block is reserved for transparent texels
+    dist[:, :, 3] = np.where(three[:, None], np.iinfo(np.int32).max, dist[:, :, 3])
+    indices = dist.argmin(2)
+    return indices, (np.take_along_axis(dist, indices[:, :, None], 2)[:, :, 0] * weights).sum(1)
+
+
+def _bbox_endpoints(rgb, mask):
+    """Bounding-box diagonal endpoints, full and inset by 1/16, oriented
+    along the sign of each channel's covariance with the widest one."""
+    lo = np.where(mask[:, :, None], rgb, 255).min(1)
+    hi = np.where(mask[:, :, None], rgb, 0).max(1)
+    empty = ~mask.any(1)
+    lo[empty] = hi[empty] = 0
+    centered = (rgb - (lo + hi)[:, None, :] // 2) * mask[:, :, None]
+    cov = np.einsum("npi,npj->nij", centered, centered)
+    ref = (hi - lo).argmax(1)
+    flip = np.take_along_axis(cov, ref[:, None, None], 1)[:, 0, :] < 0
+    e0, e1 = np.where(flip, lo, hi), np.where(flip, hi, lo)
+    inset = (e0 - e1) // 16
+    return [(e0, e1), (e0 - inset, e1 + inset)]
+
+
+def _least_squares(rgb, weights, indices, three):
+    """(e0, e1, ok): endpoints that best reproduce rgb with the given
+    indices; not ok for blocks where every texel used one index."""
+    scale = np.where(three, 2, 3)[:, None]
+    a = np.where(three[:, None], BC_WEIGHTS3[indices], BC_WEIGHTS4[indices])
+    w = np.where(three[:, None] & (indices == 3), 0, weights).astype(np.int64)
+    b = scale - a
+    aa, ab, bb = (w * a * a).sum(1), (w * a * b).sum(1), (w * b * b).sum(1)
+    x = ((w * a)[:, :, None] * rgb).sum(1)
+    y = ((w * b)[:, :, None] * rgb).sum(1)
+    det = (aa * bb - ab * ab)[:, None]
+    ok = det[:, 0] > 0
+    det = np.where(det > 0, det, 1)
+    e0 = (2 * scale * (bb[:, None] * x - ab[:, None] * y) + det) // (2 * det)
+    e1 = (2 * scale * (aa[:, None] * y - ab[:, None] * x) + det) // (2 * det)
+    return e0, e1, ok
+
+
+def _bc_color(rgba, punch_through):
+    """(N,) uint64 BC1 color blocks. With punch_through, blocks with any
+    texel under half alpha use three-color mode and make those texels
+    transparent (BC1); otherwise every block is four-color (BC3)."""
+    rgb = rgba[:, :, :3]
+    if punch_through:
+        clear = rgba[:, :, 3] < 128
+        weights = np.where(clear, 0, 255)
+    else:
+        clear = np.zeros(rgba.shape[:2], bool)
+        weights = rgba[:, :, 3]
+    three = clear.any(1)
+    mask = weights > 0
+
+    best = None
+    for e0, e1 in _bbox_endpoints(rgb, mask):
+        c0, c1 = _pack565(e0), _pack565(e1)
+        indices, err = _bc_fit(rgb, weights, c0, c1, three)
+        best = [c0, c1, indices, err] if best is None else _keep_better(best, [c0, c1, indices, err], err < best[3])
+    for _ in range(2):
+        e0, e1, ok = _least_squares(rgb, weights, best[2], three)
+        c0, c1 = _pack565(e0), _pack565(e1)
+        indices, err = _bc_fit(rgb, weights, c0, c1, three)
+        best = _keep_better(best, [c0, c1, indices, err], ok & (err < best[3]))
+    c0, c1, indices, _ = best
+
+    # Four-color blocks need c0 > c1 and three-color ones c0 <= c1;
+    # swapping the endpoints swaps indices 0/1 (and 2/3 with four colors)
+    swap = np.where(three, c0 > c1, c0 < c1)
+    remap = np.where(three[:, None], [1, 0, 2, 3], [1, 0, 3, 2])
+    indices = np.where(swap[:, None], np.take_along_axis(remap, indices, 1), indices)
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+    # Equal endpoints read as three-color: every opaque texel is index 0
+    indices = np.where(((c0 == c1) & ~three)[:, None], 0, indices)
+    indices = np.where(clear, 3, indices)
+    return c0.astype(np.uint64) | (c1.astype(np.uint64) << 16) | (_pack_bits(indices, BC_SHIFTS) << 32)
+
+
+def _bc3_alpha(alpha):
+    """(N,) uint64 BC3 alpha blocks: the better of eight interpolated
+    values between min and max, or six between the inner min and max
+    plus exact 0 and 255 (what sprite edges mostly are)."""
+    lo, hi = alpha.min(1), alpha.max(1)
+    inner = (alpha > 0) & (alpha < 255)
+    ilo = np.where(inner, alpha, 255).min(1)
+    ihi = np.where(inner, alpha, 0).max(1)
+    ilo, ihi = np.where(inner.any(1), ilo, 0), np.where(inner.any(1), ihi, 0)
+
+    k = np.arange(1, 7)
+    pal8 = np.concatenate([hi[:, None], lo[:, None], ((7 - k) * hi[:, None] + k * lo[:, None] + 3) // 7], 1)
+    k = np.arange(1, 5)
+    pal6 = np.concatenate(
+        [
+            ilo[:, None],
+            ihi[:, None],
+            ((5 - k) * ilo[:, None] + k * ihi[:, None] + 2) // 5,
+            np.zeros((len(alpha), 1), int),
+            np.full((len(alpha), 1), 255),
+        ],
+        1,
+    )
+    fits = []
+    for palette in (pal8, pal6):
+        dist = (alpha[:, :, None] - palette[:, None, :]) ** 2
+        indices = dist.argmin(2)
+        fits.append((indices, np.take_along_axis(dist, indices[:, :, None], 2)[:, :, 0].sum(1)))
+    # a0 == a1 means six-value mode, so eight values need a range
+    use8 = (fits[0][1] < fits[1][1]) & (hi > lo)
+    a0, a1 = np.where(use8, hi, ilo), np.where(use8, lo, ihi)
+    indices = np.where(use8[:, None], fits[0][0], fits[1][0])
+    return a0.astype(np.uint64) | (a1.astype(np.uint64) << 8) | _pack_bits(indices, BC3_ALPHA_SHIFTS)
+
+
+def encode_bc1(blocks):
+    return _encode(blocks, lambda b: _bc_color(b, punch_through=True)[:, None], "<u8")
+
+
+def encode_bc3(blocks):
+    return _encode(blocks, lambda b: np.stack([_bc3_alpha(b[:, :, 3]), _bc_color(b, punch_through=False)], 1), "<u8")
+
+
+def _decode_bc_color(v, punch_through):
+    c0, c1 = (v & 0xFFFF).astype(np.int64), ((v >> 16) & 0xFFFF).astype(np.int64)
+    three = (c0 <= c1) if punch_through else np.zeros(len(v), bool)
+    indices = ((v[:, None] >> (32 + np.array(BC_SHIFTS, np.uint64))) & 3).astype(np.int64)
+    rgb = np.take_along_axis(_bc_palette(c0, c1, three), indices[:, :, None], 1)
+    alpha = np.where(three[:, None] & (indices == 3), 0, 255)
+    return np.concatenate([rgb, alpha[:, :, None]], 2)
+
+
+def _decode_bc3_alpha(v):
+    a0, a1 = (v & 255).astype(np.int64)[:, None], ((v >> 8) & 255).astype(np.int64)[:, None]
+    k6, k4 = np.arange(1, 7), np.arange(1, 5)
+    pal8 = np.concatenate([a0, a1, ((7 - k6) * a0 + k6 * a1 + 3) // 7], 1)
+    zeros = np.zeros_like(a0)
+    pal6 = np.concatenate([a0, a1, ((5 - k4) * a0 + k4 * a1 + 2) // 5, zeros, zeros + 255], 1)
+    palette = np.where(a0 > a1, pal8, pal6)
+    indices = ((v[:, None] >> np.array(BC3_ALPHA_SHIFTS, np.uint64)) & 7).astype(np.int64)
+    return np.take_along_axis(palette, indices, 1)
+
+
+def decode_bc1(data):
+    return _decode_bc_color(np.frombuffer(data, "<u8").astype(np.uint64), punch_through=True)
+
+
+def decode_bc3(data):
+    v = np.frombuffer(data, "<u8").astype(np.uint64).reshape(-1, 2)
+    texels = _decode_bc_color(v[:, 1], punch_through=False)
+    texels[:, :, 3] = _decode_bc3_alpha(v[:, 0])
+    return texels
+
+
+# ─── ETC2 RGBA ───────────────────────────────────────────────────────
+
+# Intensity modifiers by table, in pixel index order (msb, lsb): 00 01 10 11
+ETC_MODIFIERS = np.array(
+    [[a, b, -a, -b] for a, b in [(2, 8), (5, 17), (9, 29), (13, 42), (18, 60), (24, 80), (33, 106), (47, 183)]]
+)
+EAC_MODIFIERS = np.array(
+    [
+        [-3, -6, -9, -15, 2, 5, 8, 14],
+        [-3, -7, -10, -13, 2, 6, 9, 12],
+        [-2, -5, -8, -13, 1, 4, 7, 12],
+        [-2, -4, -6, -13, 1, 3, 5, 12],
+        [-3, -6, -8, -12, 2, 5, 7, 11],
+        [-3, -7, -9, -11, 2, 6, 8, 10],
+        [-4, -7, -8, -11, 3, 6, 7, 10],
+        [-3, -5, -8, -11, 2, 4, 7, 10],
+        [-2, -6, -8, -10, 1, 5, 7, 9],
+        [-2, -5, -8, -10, 1, 4, 7, 9],
+        [-2, -4, -8, -10, 1, 3, 7, 9],
+        [-2, -5, -7, -10, 1, 4, 6, 9],
+        [-3, -4, -7, -10, 2, 3, 6, 9],
+        [-1, -2, -3, -10, 0, 1, 2, 9],
+        [-4, -6, -8, -9, 3, 5, 7, 8],
+        [-3, -5, -7, -9, 2, 4, 6, 8],
+    ]
+)
+# Table 13 has a zero modifier at index 4: exact for single-alpha blocks
+EAC_FLAT_TABLE, EAC_FLAT_INDEX = 13, 4
+
+# ETC texels are numbered column-major: texel (x, y) is x * 4 + y
+_TEXEL = np.array([(p % 4) * 4 + p // 4 for p in range(16)])
+# Row-major texels of sub-block 0 and 1 for flip 0 (2x4 side by side) and flip 1 (4x2 stacked)
+ETC_SUBBLOCKS = [
+    [[p for p in range(16) if p % 4 < 2], [p for p in range(16) if p % 4 >= 2]],
+    [[p for p in range(16) if p < 8], [p for p in range(16) if p >= 8]],
+]
+
+
+def _etc_tables(rgb, weights, base):
+    """(table, indices, error) of the best intensity table for one
+    sub-block per block: rgb (N, 8, 3), base (N, 3) expanded colors."""
+    # int32 halves the memory traffic; the worst error, 3 * 255^2 * 255 * 8, still fits
+    colors = np.clip(base[:, None, None, :] + ETC_MODIFIERS[None, :, :, None], 0, 255).astype(np.int32)
+    diff = rgb.astype(np.int32)[:, None, None, :, :] - colors[:, :, :, None, :]
+    diff *= diff
+    dist = diff[..., 0] + diff[..., 1] + diff[..., 2]  # (N, table, index, texel)
+    indices = dist.argmin(2)
+    err = (dist.min(2) * weights.astype(np.int32)[:, None, :]).sum(2)
+    table = err.argmin(1)
+    rows = np.arange(len(rgb))
+    return table, indices[rows, table], err[rows, table]
+
+
+def _mean_color(rgb, weights):
+    total = weights.sum(1)[:, None]
+    return ((rgb * weights[:, :, None]).sum(1) + total // 2) // np.maximum(total, 1)
+
+
+def _etc_color(rgba):
+    """(N,) uint64 ETC2 color blocks (individual or differential mode)."""
+    rgb, weights = rgba[:, :, :3], rgba[:, :, 3]
+    candidates = []
+    for flip, subblocks in enumerate(ETC_SUBBLOCKS):
+        means = [_mean_color(rgb[:, texels], weights[:, texels]) for texels in subblocks]
+        q4 = [(m * 15 + 127) // 255 for m in means]
+        q5 = [(m * 31 + 127) // 255 for m in means]
+        # The second color is stored as a 3-bit delta; clamp it into range
+        q5[1] = q5[0] + np.clip(q5[1] - q5[0], -4, 3)
+        for diff, quantized in ((0, q4), (1, q5)):
+            fits = []
+            for texels, q in zip(subblocks, quantized):
+                base = (q << 3) | (q >> 2) if diff else q * 17
+                fits.append(_etc_tables(rgb[:, texels], weights[:, texels], base))
+            candidates.append((flip, diff, quantized, fits))
+
+    errors = np.stack([fits[0][2] + fits[1][2] for _, _, _, fits in candidates], 1)
+    choice = errors.argmin(1)
+    out = np.zeros(len(rgba), np.uint64)
+    for c, (flip, diff, (q0, q1), fits) in enumerate(candidates):
+        pick = choice == c
+        if not pick.any():
+            continue
+        first = q0.astype(np.uint64)
+        second = ((q1 - q0) & 7 if diff else q1).astype(np.uint64)
+        shift = np.array([59, 51, 43] if diff else [60, 52, 44], np.uint64)
+        block = np.bitwise_or.reduce((first << shift) | (second << np.array([56, 48, 40], np.uint64)), axis=1)
+        block |= (fits[0][0].astype(np.uint64) << 37) | (fits[1][0].astype(np.uint64) << 34)
+        block |= np.uint64(diff << 33 | flip << 32)
+        indices = np.zeros((len(rgba), 16), np.int64)
+        for texels, (_, sel, _) in zip(ETC_SUBBLOCKS[flip], fits):
+            indices[:, texels] = sel
+        block |= _pack_bits(indices >> 1, _TEXEL + 16) | _pack_bits(indices & 1, _TEXEL)
+        out[pick] = block[pick]
+    return out
+
+
+def _eac_fit(alpha, base, mult, table):
+    """(indices, error) of the nearest EAC value per texel for (M, ...)
+    candidate base/multiplier/table arrays of the same shape."""
+    values = np.clip(base[..., None] + EAC_MODIFIERS[table] * mult[..., None], 0, 255).astype(np.int32)
+    shape = (len(alpha),) + (1,) * (base.ndim - 1) + (16, 1)
+    dist = alpha.astype(np.int32).reshape(shape) - values[..., None, :]
+    dist *= dist  # (M, ..., texel, index)
+    return dist.argmin(-1), dist.min(-1).sum(-1)
+
+
+def _eac_alpha(alpha):
+    """(N,) uint64 EAC alpha blocks. Flat blocks store their alpha exactly;
+    the rest try every table with the multipliers around the one that
+    spans the block's range at a centered base, then nudge the base."""
+    lo, hi = alpha.min(1), alpha.max(1)
+    base = lo.copy()
+    mult = np.ones(len(alpha), np.int64)
+    table = np.full(len(alpha), EAC_FLAT_TABLE)
+    indices = np.full(alpha.shape, EAC_FLAT_INDEX)
+
+    tables = np.arange(16)
+    tmin, tmax = EAC_MODIFIERS.min(1), EAC_MODIFIERS.max(1)
+    mixed = np.flatnonzero(hi > lo)
+    for start in range(0, len(mixed), EAC_BATCH):
+        sel = mixed[start : start + EAC_BATCH]
+        a, a_lo, a_hi = alpha[sel], lo[sel, None], hi[sel, None]
+        rows = np.arange(len(sel))
+        # (M, table, multiplier) candidates; ceil((hi - lo) / table range) spans the block
+        span = -((a_lo - a_hi) // (tmax - tmin))
+        m = np.clip(span[:, :, None] + np.array([-1, 0, 1]), 1, 15)
+        center = np.clip(((a_lo + a_hi)[:, :, None] - (tmin + tmax)[None, :, None] * m + 1) // 2, 0, 255)
+        t = np.broadcast_to(tables[None, :, None], m.shape)
+        _, err = _eac_fit(a, center, m, t)
+        t, mi = np.unravel_index(err.reshape(len(sel), -1).argmin(1), m.shape[1:])
+        m, center = m[rows, t, mi], center[rows, t, mi]
+        # Base offsets for the chosen table and multiplier
+        b = np.clip(center[:, None] + np.arange(-2, 3), 0, 255)
+        fit, err = _eac_fit(a, b, np.broadcast_to(m[:, None], b.shape), np.broadcast_to(t[:, None], b.shape))
+        bi = err.argmin(1)
+        table[sel], mult[sel], base[sel], indices[sel] = t, m, b[rows, bi], fit[rows, bi]
+
+    block = (base.astype(np.uint64) << 56) | (mult.astype(np.uint64) << 52) | (table.astype(np.uint64) << 48)
+    return block | _pack_bits(indices, 45 - 3 * _TEXEL)
+
+
+def encode_etc2(blocks):
+    return _encode(blocks, lambda b: np.stack([_eac_alpha(b[:, :, 3]), _etc_color(b)], 1), ">u8")
+
+
+def decode_etc2(data):
+    """Decode ETC2 RGBA8 blocks in the modes encode_etc2() writes."""
+    v = np.frombuffer(data, ">u8").astype(np.uint64).reshape(-1, 2)
+    alpha, color = v[:, 0], v[:, 1]
+
+    def bits(word, shift, count):
+        return ((word >> np.uint64(shift)) & np.uint64((1 << count) - 1)).astype(np.int64)
+
+    base, mult, table = bits(alpha, 56, 8), bits(alpha, 52, 4), bits(alpha, 48, 4)
+    a_idx = ((alpha[:, None] >> (45 - 3 * _TEXEL).astype(np.uint64)) & np.uint64(7)).astype(np.int64)
+    a = np.clip(base[:, None] + EAC_MODIFIERS[table[:, None], a_idx] * mult[:, None], 0, 255)
+
+    diff, flip = bits(color, 33, 1).astype(bool), bits(color, 32, 1)
+    bases = []
+    for ch in range(3):
+        c1_4, c2_4 = bits(color, 60 - 8 * ch, 4), bits(color, 56 - 8 * ch, 4)
+        c1_5, d = bits(color, 59 - 8 * ch, 5), bits(color, 56 - 8 * ch, 3)
+        c2_5 = c1_5 + np.where(d >= 4, d - 8, d)
+        bases.append(
+            [
+                np.where(diff, (c1_5 << 3) | (c1_5 >> 2), c1_4 * 17),
+                np.where(diff, (c2_5 << 3) | (c2_5 >> 2), c2_4 * 17),
+            ]
+        )
+    msb = ((color[:, None] >> (_TEXEL + 16).astype(np.uint64)) & np.uint64(1)).astype(np.int64)
+    lsb = ((color[:, None] >> _TEXEL.astype(np.uint64)) & np.uint64(1)).astype(np.int64)
+    sub = np.where(flip[:, None] == 1, np.arange(16) >= 8, np.arange(16) % 4 >= 2).astype(np.int64)
+    tables = np.stack([bits(color, 37, 3), bits(color, 34, 3)], 1)
+    modifier = ETC_MODIFIERS[np.take_along_axis(tables, sub, 1), msb * 2 + lsb]
+    rgb = np.stack([np.clip(np.where(sub == 1, c[1][:, None], c[0][:, None]) + modifier, 0, 255) for c in bases], 2)
+    return np.concatenate([rgb, a[:, :, None]], 2)
+
+
+# ─── KTX2 ────────────────────────────────────────────────────────────
+
+KTX2_IDENTIFIER = b"\xabKTX 20\xbb\r\n\x1a\n"
+KTX2_WRITER = "compress_textures.py"
+
+# vkFormat, data format descriptor color model, bytes per block and
+# samples as (channel id, bit offset), per the Khronos Data Format spec
+FORMATS = {
+    "bc1": {"vk": 133, "model": 128, "block": 8, "samples": [(1, 0)], "encode": encode_bc1, "decode": decode_bc1},
+    "bc3": {
+        "vk": 137,
+        "model": 130,
+        "block": 16,
+        "samples": [(15, 0), (0, 64)],
+        "encode": encode_bc3,
+        "decode": decode_bc3,
+    },
+    "etc2": {
+        "vk": 151,
+        "model": 161,
+        "block": 16,
+        "samples": [(15, 0), (2, 64)],
+        "encode": encode_etc2,
+        "decode": decode_etc2,
+    },
+}
+
+
+def _dfd(fmt):
+    """Basic data format descriptor of a 4x4 block format: straight alpha,
+    BT.709 primaries, linear (UNORM) transfer."""
+    spec = FORMATS[fmt]
+    samples = spec["samples"]
+    size = 24 + 16 * len(samples)
+    # vendor/type, version/size, model/primaries/transfer/flags, block dimensions - 1, bytes per plane
+    block = struct.pack("<II4B4B8B", 0, 2 | size << 16, spec["model"], 1, 1, 0, 3, 3, 0, 0, spec["block"], *[0] * 7)
+    for channel, offset in samples:
+        block += struct.pack("<HBB4BII", offset, 63, channel, 0, 0, 0, 0, 0, 0xFFFFFFFF)
+    return struct.pack("<I", 4 + size) + block
+
+
+def ktx2_bytes(fmt, size, data):
+    """A single-level, single-face KTX2 file holding data."""
+    width, height = size
+    dfd = _dfd(fmt)
+    key_value = f"KTXwriter\0{KTX2_WRITER}\0".encode()
+    kvd = struct.pack("<I", len(key_value)) + key_value
+    kvd += b"\0" * (-len(kvd) % 4)
+    dfd_offset = 12 + 36 + 32 + 24
+    kvd_offset = dfd_offset + len(dfd)
+    align = math.lcm(FORMATS[fmt]["block"], 4)
+    data_offset = -(-(kvd_offset + len(kvd)) // align) * align
+    # vkFormat, typeSize, size, depth, layers, faces, levels, supercompression
+    header = struct.pack("<9I", FORMATS[fmt]["vk"], 1, width, height, 0, 0, 1, 1, 0)
+    index = struct.pack("<4I2Q", dfd_offset, len(dfd), kvd_offset, len(kvd), 0, 0)
+    level = struct.pack("<3Q", data_offset, len(data), len(data))
+    body = KTX2_IDENTIFIER + header + index + level + dfd + kvd
+    return body + b"\0" * (data_offset - len(body)) + data
+
+
+def ktx2_path(png_path, fmt):
+    return f"{os.path.splitext(png_path)[0]}.{fmt}.ktx2"
+
+
+# ─── Report ──────────────────────────────────────────────────────────
+
+
+def psnr(original, decoded):
+    """PSNR in dB of two (N, 16, 4) texel arrays over premultiplied RGBA;
+    inf when identical."""
+    def premultiplied(texels):
+        texels = texels.astype(np.int64)
+        return np.concatenate([(texels[:, :, :3] * texels[:, :, 3:] + 127) // 255, texels[:, :, 3:]], 2)
+
+    mse = ((premultiplied(original) - premultiplied(decoded)) ** 2).mean()
+    return math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+
+
+def compress(img, fmt):
+    """(KTX2 bytes, padded size, PSNR) of img in fmt."""
+    blocks, size = to_blocks(img)
+    data = FORMATS[fmt]["encode"](blocks)
+    return ktx2_bytes(fmt, size, data), size, psnr(blocks, FORMATS[fmt]["decode"](data))
+
+
+def format_psnr(db):
+    return "exact" if db == math.inf else f"{db:.1f} dB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write BC/ETC2 block-compressed KTX2 copies of the sprites")
+    parser.add_argument("keys", nargs="*", help="Texture keys or globs (default: all)")
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=list(FORMATS),
+        default=["bc3", "etc2"],
+        help="Block formats to write (default: bc3 etc2)",
+    )
+    parser.add_argument("--json", help="Also write the size/PSNR report here")
+    parser.add_argument(
+        "--hashed",
+        action="store_true",
+        help="Also write content-hashed copies (name.<hash>.ktx2) of every output",
+    )
+    args = parser.parse_args()
+
+    sources = atlas_sources()
+    keys = [k for k in sources if not args.keys or any(fnmatch(k, p) for p in args.keys)]
+    if not keys:
+        print(f"Error: no texture key matches: {', '.join(args.keys)}")
+        print(f"Available: {', '.join(sources)}")
+        sys.exit(1)
+
+    try:
+        with open(MANIFEST_PATH) as f:
+            recorded = json.load(f).get("assets", {})
+    except (OSError, ValueError):
+        recorded = {}
+
+    print(f"Compressing textures ({', '.join(args.formats)})...")
+    start = time.perf_counter()
+    report = {}
+    entries = {}
+    for key in keys:
+        path = sources[key]["path"]
+        if not os.path.isfile(path):
+            print(f"  SKIP {key}: not built yet ({path})")
+            continue
+        img = Image.open(path)
+        png_bytes = os.path.getsize(path)
+        row = report[key] = {"png": png_bytes, "rgba": img.width * img.height * 4, "formats": {}}
+        compressed = {}
+        for fmt in args.formats:
+            data, (width, height), db = compress(img, fmt)
+            out = ktx2_path(path, fmt)
+            with open(out, "wb") as f:
+                f.write(data)
+            row["formats"][fmt] = {"bytes": len(data), "psnr": None if db == math.inf else round(db, 2)}
+            compressed[fmt] = {
+                **file_entry(os.path.relpath(out, ASSETS_DIR), data),
+                "width": width,
+                "height": height,
+                "psnr": row["formats"][fmt]["psnr"],
+            }
+        if key in recorded:
+            entries[key] = {**recorded[key], "compressed": compressed}
+        cells = "  ".join(
+            f"{fmt} {v['bytes']} B {format_psnr(math.inf if v['psnr'] is None else v['psnr'])}"
+            for fmt, v in row["formats"].items()
+        )
+        print(f"  {key}: {img.width}x{img.height}, png {png_bytes} B, rgba {row['rgba']} B  {cells}")
+
+    if entries:
+        update_manifest(entries, hashed=args.hashed)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"  report: {args.json}")
+
+    rgba = sum(row["rgba"] for row in report.values())
+    print(f"\nDone: {len(report)} texture(s) in {time.perf_counter() - start:.1f}s, {rgba} B as RGBA8:")
+    for fmt in args.formats:
+        total = sum(row["formats"][fmt]["bytes"] for row in report.values())
+        print(f"  {fmt}: {total} B ({total / max(rgba, 1):.0%} of RGBA8 GPU memory)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,66 @@ Usage:
     python downscale_assets.py                  # process all sprites
     python downscale_assets.py player           # process only "player"
     python downscale_assets.py --resampling nearest   # use NEAREST instead of LANCZOS
+    python downscale_assets.py --no-cache       # ignore the resize cache and frame store
+    python downscale_assets.py --jobs 8         # spread sprites and frames over 8 processes
+    python downscale_assets.py --optimize       # palette-quantized, size-optimized PNGs
+    python downscale_assets.py --png-threads 4  # deflate big sheets on 4 threads
+    python downscale_assets.py --formats webp   # plus lossless WebP where smaller than the PNG
+    python downscale_assets.py --profile --trace trace.json   # per-stage timings + trace
+    python downscale_assets.py --pre-reduce     # box-reduce big frames before resampling (faster)
+    python downscale_assets.py -j 8 --max-memory-mb 512   # bound frames decoding at once
+    python downscale_assets.py --scales 0.5 1 2 # also write @0.5x and @2x densities
+    python downscale_assets.py --hashed         # also write content-hashed copies for the CDN
+    python downscale_assets.py --dedup          # store repeated strip frames once (remap in manifest)
+    python downscale_assets.py --trim           # crop transparent borders (offsets in manifest)
+    python downscale_assets.py --watch          # stay running, rebuild sprites as frames change
+    python downscale_assets.py --out build/assets.zip   # write into a folder, .zip or .tar(.gz)
+    python downscale_assets.py --dry-run        # list what is stale and why, write nothing
+    python downscale_assets.py --force          # reprocess everything, stale or not
+
+Every run records what it wrote in assets/manifest.json (see asset_manifest.py).
+Only sprites whose frames, SPRITES entry, options or processing code
+changed since the last run are reprocessed; see asset_graph.py.
+
+From Python, build_sprite(name) returns a sprite's outputs in memory:
+
+    from downscale_assets import build_sprite
+    images = build_sprite("enemy-boss")                       # {"enemy-boss": Image}
+    pngs = build_sprite("player", scales=[1, 2], encoded=True)  # {"player": bytes, "player@2x": bytes}
 """
 
 import argparse
+import collections
+import hashlib
+import io
+import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
+import numpy as np
 from PIL import Image
 
+from asset_graph import BuildState, code_fingerprints, node_name, options_digest, print_plan
+from asset_manifest import ASSETS_DIR, make_entry, variant_path, write_manifest
+from asset_profile import NO_PROFILE, Profiler, image_bytes, print_summary, write_trace
+from asset_sinks import DirectorySink, MemorySink, is_archive, open_sink
+from optimize_png import (
+    VARIANT_FORMATS,
+    chunked,
+    describe_saving,
+    describe_variants,
+    encode,
+    supported_formats,
+    variants,
+)
+from sprite_frames import dedup_remap, frame_digest, trim_image
+
 ROOT = os.path.dirname(__file__)
+CACHE_DIR = os.path.join(ROOT, ".cache", "downscale")
+FRAMES_DIR = os.path.join(ROOT, ".cache", "frames")
 
 # ─── Sprite definitions ──────────────────────────────────────────────
 # src:        folder with individual frame PNGs (relative to project root)
@@ -22,6 +73,9 @@ ROOT = os.path.dirname(__file__)
 # frame_size: target width & height in pixels per frame
 # layout:     "strip" = horizontal spritesheet, "single" = one image
 # frames:     ordered list of frame basenames (without .png)
+# scales:     optional densities relative to frame_size (default [1]), e.g.
+#             [0.5, 1, 2]; 1x writes dst, every other density writes
+#             "<dst stem>@<scale>x.png" (player@2x.png, player@0.5x.png)
 
 SPRITES = {
     "player": {
@@ -87,6 +141,17 @@ SPRITES = {
     # ── Add more sprites here as needed ───────────────────────
 }
 
+
+def owned_outputs():
+    """{output path under the assets folder: source folder} of the sprites
+    that have source art. Those files are this script's; generate_assets.py
+    leaves the placeholders it would draw there alone."""
+    return {
+        os.path.relpath(os.path.join(ROOT, cfg["dst"]), ASSETS_DIR): cfg["src"]
+        for cfg in SPRITES.values()
+        if os.path.isdir(os.path.join(ROOT, cfg["src"]))
+    }
+
 RESAMPLING_METHODS = {
     "lanczos": Image.LANCZOS,
     "nearest": Image.NEAREST,
@@ -94,56 +159,882 @@ RESAMPLING_METHODS = {
     "bicubic": Image.BICUBIC,
 }
 
+# With --pre-reduce, frames are first box-reduced by an integer factor that
+# keeps them at least REDUCING_GAP x the target size, and only that last
+# step runs the quality filter. The box filter blurs before LANCZOS sees
+# the frame, so the output drifts from a full-resolution resample: on
+# enemy-tank by 3.1 levels per channel on average and up to 65 on hard
+# edges. Opt-in, for fast previews. The reduced draft decode (JPEG only)
+# applies only with --no-cache: the frame store keeps and serves frames at
+# full resolution, so with it only the box-reduce runs.
+REDUCING_GAP = 2.0
+
+
+# ─── Resize cache ────────────────────────────────────────────────────
+# Resized frames and assembled outputs are stored as PNGs named after a
+# hash of everything that determines their pixels, so unchanged sprites
+# never get decoded or resampled twice. Each output also gets a .json
+# with what the manifest needs (size, dedup remap, trim offsets). Hits bump the file mtime, which
+# is what prune() uses as the LRU order.
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(*parts):
+    return hashlib.sha256("\0".join(str(p) for p in parts).encode()).hexdigest()
+
+
+class ResizeCache:
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, key, ext="png"):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{ext}")
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        """Return the cached image for key, or None."""
+        path = self._path(key)
+        try:
+            img = Image.open(path)
+            img.load()
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        return img
+
+    def put(self, key, img):
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        self.put_bytes(key, buf.getvalue())
+
+    def get_bytes(self, key, ext="png"):
+        """Return the raw cached file for key, or None."""
+        path = self._path(key, ext)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._touch(path)
+        return data
+
+    def put_bytes(self, key, data, ext="png"):
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so an interrupted run never leaves a torn entry
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def prune(self):
+        """Evict least recently used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for fn in filenames:
+                path = os.path.join(dirpath, fn)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        evicted = 0
+        for _, fsize, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= fsize
+            evicted += 1
+        return evicted
+
+
+# ─── Decoded frame store ─────────────────────────────────────────────
+# Decoded full-resolution RGBA source frames, kept as raw .npy arrays and
+# memory-mapped back, so a run with another filter or frame size reads
+# pixels straight from the page cache instead of inflating PNGs again.
+# A sidecar .json records the source's mtime, size and sha256: matching
+# mtime and size are trusted, otherwise the source is re-hashed and the
+# entry only survives if its content is unchanged (e.g. a fresh checkout).
+
+
+class FrameStore(ResizeCache):
+    def _files(self, path):
+        key = cache_key(os.path.abspath(path))
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return f"{base}.npy", f"{base}.json"
+
+    def _write(self, path, write):
+        """Write-then-rename, as in put_bytes()."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Return the decoded RGBA frame for source path (memory-mapped,
+        read-only), or None if it isn't stored or the source changed."""
+        npy_path, meta_path = self._files(path)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            st = os.stat(path)
+            if (meta["mtime_ns"], meta["size"]) != (st.st_mtime_ns, st.st_size):
+                if meta["size"] != st.st_size or meta["sha256"] != file_digest(path):
+                    return None
+                meta["mtime_ns"] = st.st_mtime_ns
+                self._write(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+            pixels = np.load(npy_path, mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        if pixels.ndim != 3 or pixels.shape[2] != 4 or pixels.dtype != np.uint8:
+            return None
+        self._touch(npy_path)
+        self._touch(meta_path)
+        h, w = pixels.shape[:2]
+        return Image.frombuffer("RGBA", (w, h), pixels, "raw", "RGBA", 0, 1)
+
+    def store(self, path, img):
+        """Record img as the decoded RGBA pixels of source path."""
+        npy_path, meta_path = self._files(path)
+        st = os.stat(path)
+        meta = {"source": os.path.abspath(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        meta["sha256"] = file_digest(path)
+        # Pixels first: an entry only counts once its header exists
+        self._write(npy_path, lambda f: np.save(f, np.asarray(img)))
+        self._write(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+
+
+# ─── Decoded frame LRU ───────────────────────────────────────────────
+# The resident --watch process keeps recently decoded source frames in
+# memory, checked against the source's mtime and size, in front of the
+# frame store. It has the FrameStore load/store interface, so it plugs
+# into load_and_resize() as `frames`; frames are decoded in this process
+# in watch mode, so the LRU is never copied to pool workers.
+
+
+class FrameLRU:
+    def __init__(self, max_bytes, store=None):
+        self.max_bytes = max_bytes
+        self.store_backend = store
+        self.used = 0
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        key = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached and cached[0] == (st.st_mtime_ns, st.st_size):
+                self._frames.move_to_end(key)
+                return cached[1]
+        img = self.store_backend.load(path) if self.store_backend else None
+        if img is not None:
+            self._remember(key, (st.st_mtime_ns, st.st_size), img)
+        return img
+
+    def store(self, path, img):
+        if self.store_backend:
+            self.store_backend.store(path, img)
+        st = os.stat(path)
+        self._remember(os.path.abspath(path), (st.st_mtime_ns, st.st_size), img)
+
+    def _remember(self, key, stamp, img):
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old:
+                self.used -= image_bytes(old[1])
+            self._frames[key] = (stamp, img)
+            self.used += image_bytes(img)
+            # Drop least recently used frames, never the one just added
+            while self.used > self.max_bytes and len(self._frames) > 1:
+                _, (_, evicted) = self._frames.popitem(last=False)
+                self.used -= image_bytes(evicted)
+
+    def prune(self):
+        return self.store_backend.prune() if self.store_backend else 0
+
+
+def reduce_factor(src_size, size, resampling):
+    """Integer (x, y) box-reduction factors for a src_size frame headed for
+    size x size. NEAREST gets none: averaging would blend the pixel-art
+    colors it is meant to keep, and it only samples the pixels it needs."""
+    if resampling == Image.NEAREST:
+        return 1, 1
+    return tuple(max(1, int(n / (size * REDUCING_GAP))) for n in src_size)
 
-def process_sprite(name, cfg, resampling):
+
+def density_sizes(cfg, scales=None):
+    """[(scale, frame size)] for every density of a sprite, largest first."""
+    levels = {}
+    for scale in scales or cfg.get("scales") or [1]:
+        levels.setdefault(max(1, round(cfg["frame_size"] * scale)), scale)
+    return sorted(((scale, size) for size, scale in levels.items()), key=lambda level: -level[1])
+
+
+def density_path(dst_path, scale):
+    """Output path for one density: dst_path itself at 1x."""
+    if scale == 1:
+        return dst_path
+    base, ext = os.path.splitext(dst_path)
+    return f"{base}@{scale:g}x{ext}"
+
+
+def shrink(img, size, resampling, pre_reduce=False):
+    """Resample img to size x size RGBA, box-reducing it first with pre_reduce."""
+    if pre_reduce:
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        factor = reduce_factor(img.size, size, resampling)
+        if factor != (1, 1):
+            img = img.reduce(factor)
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    return img.resize((size, size), resampling)
+
+
+def load_and_resize(path, sizes, resampling, item="", prof=NO_PROFILE, pre_reduce=False, frames=None):
+    """Decode one source frame and downscale it to every size in sizes
+    (largest first). Runs in pool workers.
+
+    Returns ([frame per size], source size). The largest size is
+    resampled from the source and each smaller one from the level above
+    it, so the source is decoded once however many densities there are.
+    With pre_reduce, draft-capable formats (JPEG) decode at a reduced scale
+    and frames are box-reduced before the quality filter; they are also
+    converted to RGBA only once small. With a FrameStore (the default),
+    decoded frames come from (and go to) the store at full resolution
+    instead, so only the box-reduce runs; the store stays the same for
+    every filter, size and option.
+    """
+    with prof.stage(item, "decode") as st:
+        img = frames.load(path) if frames else None
+        if img is not None:
+            src_size = img.size
+        elif frames or not pre_reduce:
+            img = Image.open(path).convert("RGBA")
+            src_size = img.size
+            if frames:
+                frames.store(path, img)
+        else:
+            img = Image.open(path)
+            src_size = img.size
+            target = int(sizes[0] * REDUCING_GAP)
+            img.draft(None, (target, target))
+            img.load()
+        st["bytes"] += image_bytes(img)
+    levels = []
+    with prof.stage(item, "resize") as st:
+        for size in sizes:
+            img = shrink(img, size, resampling, pre_reduce)
+            levels.append(img)
+            st["bytes"] += image_bytes(img)
+    return levels, src_size
+
+
+def load_and_resize_profiled(path, sizes, resampling, item, pre_reduce=False, frames=None):
+    """load_and_resize in a pool worker, returning the worker's profile
+    events along with the result."""
+    prof = Profiler()
+    prof.start()
+    return load_and_resize(path, sizes, resampling, item, prof, pre_reduce, frames), prof.events
+
+
+# ─── Streaming ───────────────────────────────────────────────────────
+
+
+def frame_cost(path):
+    """Rough peak bytes for a worker to decode and convert one source frame:
+    the decoded buffer plus an RGBA copy of it, judged from the header."""
+    with Image.open(path) as img:
+        w, h = img.size
+    return w * h * 8
+
+
+class MemoryBudget:
+    """Bytes of source frames allowed in flight, shared by every sprite."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, n, block=True):
+        # A frame bigger than the whole budget still runs, just alone
+        n = min(n, self.max_bytes)
+        with self._cond:
+            while self.used + n > self.max_bytes:
+                if not block:
+                    return False
+                self._cond.wait()
+            self.used += n
+            return True
+
+    def release(self, n):
+        with self._cond:
+            self.used -= min(n, self.max_bytes)
+            self._cond.notify_all()
+
+
+def resize_frames(
+    paths, sizes, resampling, pool=None, budget=None, item="", prof=NO_PROFILE, pre_reduce=False, frames=None
+):
+    """Yield (index, [frame per size], source size) for every path as each
+    finishes.
+
+    Without a pool frames are done one at a time. With one, frames are
+    submitted while their estimated decode memory fits in the budget, and
+    each one's share is released once the caller has consumed it.
+    """
+    if not pool:
+        for i, path in enumerate(paths):
+            levels, src_size = load_and_resize(path, sizes, resampling, item, prof, pre_reduce, frames)
+            yield i, levels, src_size
+        return
+
+    waiting = collections.deque(enumerate(paths))
+    pending = {}
+    try:
+        while waiting or pending:
+            while waiting:
+                i, path = waiting[0]
+                cost = frame_cost(path) if budget else 0
+                # Block only with nothing in flight, or sprites sharing the
+                # budget could wait on each other's unconsumed frames
+                if budget and not budget.acquire(cost, block=not pending):
+                    break
+                waiting.popleft()
+                if prof.enabled:
+                    future = pool.submit(load_and_resize_profiled, path, sizes, resampling, item, pre_reduce, frames)
+                else:
+                    future = pool.submit(load_and_resize, path, sizes, resampling, pre_reduce=pre_reduce, frames=frames)
+                pending[future] = (i, cost)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, cost = pending[future]
+                result = future.result()
+                if prof.enabled:
+                    result, events = result
+                    prof.events.extend(events)
+                levels, src_size = result
+                del result
+                yield i, levels, src_size
+                del pending[future]
+                if budget:
+                    budget.release(cost)
+    finally:
+        # On failure, give back what the abandoned frames were holding
+        for future, (_, cost) in pending.items():
+            future.cancel()
+            if budget:
+                budget.release(cost)
+
+
+def process_sprite(
+    name,
+    cfg,
+    resampling,
+    cache=None,
+    pool=None,
+    log=print,
+    optimize=False,
+    prof=NO_PROFILE,
+    pre_reduce=False,
+    budget=None,
+    frames=None,
+    scales=None,
+    record=None,
+    dedup=False,
+    trim=False,
+    sink=None,
+    png_threads=1,
+    formats=(),
+):
+    """Build one sprite's outputs (one per density) and write them to sink,
+    by default the assets folder; paths in the sink are relative to it.
+    formats are the lossless variants to try next to each PNG."""
+    sink = sink or DirectorySink(ASSETS_DIR)
     src_dir = os.path.join(ROOT, cfg["src"])
     dst_path = os.path.join(ROOT, cfg["dst"])
-    size = cfg["frame_size"]
     layout = cfg["layout"]
     frames_names = cfg["frames"]
+    densities = density_sizes(cfg, scales)
+    sizes = [size for _, size in densities]
+    dst_paths = [os.path.relpath(density_path(dst_path, scale), ASSETS_DIR) for scale, _ in densities]
 
     if not os.path.isdir(src_dir):
-        print(f"  SKIP {name}: source folder not found ({src_dir})")
+        log(f"  SKIP {name}: source folder not found ({src_dir})")
         return False
 
-    # Load and validate frames
-    frames = []
+    # Locate frames
+    sources = []
     missing = []
     for fname in frames_names:
         path = os.path.join(src_dir, f"{fname}.png")
         if not os.path.isfile(path):
             missing.append(fname)
             continue
-        img = Image.open(path).convert("RGBA")
-        if img.width != img.height:
-            print(f"  WARN {name}/{fname}.png is not square ({img.width}x{img.height}), will stretch")
-        frames.append(img)
+        sources.append((fname, path))
 
     if missing:
-        print(f"  WARN {name}: missing frames: {', '.join(missing)}")
+        log(f"  WARN {name}: missing frames: {', '.join(missing)}")
 
-    if not frames:
-        print(f"  SKIP {name}: no source frames found")
+    if not sources:
+        log(f"  SKIP {name}: no source frames found")
         return False
 
-    # Downscale each frame
-    scaled = [f.resize((size, size), resampling) for f in frames]
-
-    # Assemble output
-    if layout == "strip":
-        sheet = Image.new("RGBA", (size * len(scaled), size), (0, 0, 0, 0))
-        for i, frame in enumerate(scaled):
-            sheet.paste(frame, (i * size, 0))
-        out = sheet
-    else:  # single
-        out = scaled[0]
-
-    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-    out.save(dst_path)
-    print(f"  {name}: {dst_path} ({out.width}x{out.height})")
+    def output_written(scale, path, data, meta, kept):
+        """Hand the manifest entry for one density's output to record.
+        meta: {"size", "frame", "remap", "trim"} of what was written,
+        kept: {format: bytes} of its variants."""
+        if not record:
+            return
+        key = name if scale == 1 else f"{name}@{scale:g}x"
+        names = [fname for fname, _ in sources] if layout == "strip" else None
+        entry = make_entry(
+            path,
+            data,
+            meta["size"],
+            "downscale_assets",
+            meta["frame"],
+            names,
+            meta["remap"],
+            meta["trim"],
+            variants=kept,
+        )
+        record(key, entry)
+
+    dedup = dedup and layout == "strip"
+    trim = trim and layout == "single"
+
+    # Hashing is far cheaper than decoding, so key everything on content.
+    # A pyramid level depends on every size above it ("256>128").
+    frame_keys = []
+    if cache:
+        with prof.stage(name, "hash"):
+            for _, path in sources:
+                digest = file_digest(path)
+                frame_keys.append(
+                    [
+                        cache_key(
+                            digest,
+                            ">".join(map(str, sizes[: k + 1])),
+                            int(resampling),
+                            layout,
+                            "pre-reduce" if pre_reduce else "exact",
+                        )
+                        for k in range(len(sizes))
+                    ]
+                )
+            sheet_keys = [
+                cache_key(
+                    "sheet",
+                    layout,
+                    optimize,
+                    chunked(png_threads),
+                    dedup,
+                    trim,
+                    *formats,
+                    *(keys[k] for keys in frame_keys),
+                )
+                for k in range(len(sizes))
+            ]
+        with prof.stage(name, "cache"):
+            metas = [cache.get_bytes(key, "json") for key in sheet_keys]
+            cached = [cache.get_bytes(key) for key in sheet_keys] if None not in metas else [None]
+            if None not in cached:
+                metas = [json.loads(meta) for meta in metas]
+                kepts = [
+                    {fmt: cache.get_bytes(key, fmt) for fmt in meta.get("variants", [])}
+                    for key, meta in zip(sheet_keys, metas)
+                ]
+                if any(None in kept.values() for kept in kepts):
+                    cached = [None]
+        if None not in cached:
+            for (scale, _), path, data, meta, kept in zip(densities, dst_paths, cached, metas, kepts):
+                with prof.stage(name, "write"):
+                    sink.write(path, data)
+                    for fmt, variant in kept.items():
+                        sink.write(variant_path(path, fmt), variant)
+                log(f"  {name}: {sink.location(path)} (cached)")
+                output_written(scale, path, data, meta, kept)
+            return True
+
+    # Outputs are allocated up front and each frame is pasted in as soon
+    # as it is resized, so only frames in flight are ever held in memory.
+    with prof.stage(name, "assemble") as st:
+        if layout == "strip":
+            outs = [Image.new("RGBA", (size * len(sources), size), (0, 0, 0, 0)) for size in sizes]
+            st["bytes"] += sum(image_bytes(out) for out in outs)
+        else:  # single
+            outs = [None] * len(sizes)
+
+    digests = [None] * len(sources)
+
+    def place(i, levels):
+        with prof.stage(name, "assemble"):
+            if dedup:
+                digests[i] = frame_digest(levels[0])
+            for k, frame in enumerate(levels):
+                if layout == "strip":
+                    outs[k].paste(frame, (i * sizes[k], 0))
+                else:
+                    outs[k] = frame
+
+    todo = []
+    for i in range(len(sources)):
+        levels = None
+        if cache:
+            with prof.stage(name, "cache"):
+                levels = [cache.get(key) for key in frame_keys[i]]
+        if levels is None or None in levels:
+            todo.append(i)
+        else:
+            place(i, levels)
+
+    # Decode, validate and downscale the misses; with a pool each frame is
+    # a task in a worker process.
+    stretched = []
+    paths = [sources[i][1] for i in todo]
+    for j, levels, (w, h) in resize_frames(paths, sizes, resampling, pool, budget, name, prof, pre_reduce, frames):
+        i = todo[j]
+        if w != h:
+            stretched.append((i, f"  WARN {name}/{sources[i][0]}.png is not square ({w}x{h}), will stretch"))
+        if cache:
+            with prof.stage(name, "cache"):
+                for key, frame in zip(frame_keys[i], levels):
+                    cache.put(key, frame)
+        place(i, levels)
+    # Frames complete out of order in parallel; report in frame order
+    for _, line in sorted(stretched):
+        log(line)
+
+    # Identical frames stay identical at every density, so one remap from
+    # the largest level compacts all of them
+    remap = None
+    if dedup:
+        with prof.stage(name, "dedup"):
+            unique, remap = dedup_remap(digests)
+            if len(unique) < len(sources):
+                for k, size in enumerate(sizes):
+                    compact = Image.new("RGBA", (size * len(unique), size), (0, 0, 0, 0))
+                    for j, i in enumerate(unique):
+                        compact.paste(outs[k].crop((i * size, 0, (i + 1) * size, size)), (j * size, 0))
+                    outs[k] = compact
+                log(f"  {name}: {len(sources) - len(unique)} duplicate frame(s) removed")
+
+    # Single images lose their transparent border; the manifest keeps the
+    # offset so the trimmed sprite can be drawn where the full one was
+    trims = [None] * len(sizes)
+    if trim:
+        with prof.stage(name, "trim"):
+            for k, out in enumerate(outs):
+                outs[k], trims[k] = trim_image(out)
+        x, y, w, h = trims[-1]
+        if outs[-1].size != (w, h):
+            log(f"  {name}: trimmed {w}x{h} -> {outs[-1].width}x{outs[-1].height} at ({x}, {y})")
+
+    for k, (out, path) in enumerate(zip(outs, dst_paths)):
+        with prof.stage(name, "encode"):
+            data, plain_size = encode(out, optimize, png_threads)
+        kept = {}
+        if formats:
+            with prof.stage(name, "variants"):
+                kept = variants(out, len(data), formats, optimize)
+        meta = {
+            "size": out.size,
+            "frame": (sizes[k], sizes[k]) if layout == "strip" else None,
+            "remap": remap,
+            "trim": trims[k],
+            "variants": list(kept),
+        }
+        with prof.stage(name, "write"):
+            sink.write(path, data)
+            for fmt, variant in kept.items():
+                sink.write(variant_path(path, fmt), variant)
+            if cache:
+                cache.put_bytes(sheet_keys[k], data)
+                for fmt, variant in kept.items():
+                    cache.put_bytes(sheet_keys[k], variant, fmt)
+                cache.put_bytes(sheet_keys[k], json.dumps(meta).encode(), "json")
+        output_written(densities[k][0], path, data, meta, kept)
+        notes = f", {describe_saving(len(data), plain_size)}" if optimize else ""
+        notes += f", {describe_variants(kept, len(data))}" if kept else ""
+        log(f"  {name}: {sink.location(path)} ({out.width}x{out.height}{notes})")
     return True
 
 
+def run_sprite(
+    name,
+    cfg,
+    resampling,
+    cache=None,
+    pool=None,
+    optimize=False,
+    prof=NO_PROFILE,
+    pre_reduce=False,
+    budget=None,
+    frames=None,
+    scales=None,
+    dedup=False,
+    trim=False,
+    sink=None,
+    png_threads=1,
+    formats=(),
+):
+    """Process one sprite, capturing its log lines so a failure stays local.
+
+    Returns (ok, log lines, {key: manifest entry}).
+    """
+    lines = []
+    entries = {}
+    try:
+        with prof.stage(name, "total"):
+            ok = process_sprite(
+                name,
+                cfg,
+                resampling,
+                cache,
+                pool,
+                log=lines.append,
+                optimize=optimize,
+                prof=prof,
+                pre_reduce=pre_reduce,
+                budget=budget,
+                frames=frames,
+                scales=scales,
+                record=entries.__setitem__,
+                dedup=dedup,
+                trim=trim,
+                sink=sink,
+                png_threads=png_threads,
+                formats=formats,
+            )
+    except Exception as e:
+        lines.append(f"  FAIL {name}: {type(e).__name__}: {e}")
+        ok = False
+    return ok, lines, entries
+
+
+def build_sprite(name, cfg=None, resampling=Image.LANCZOS, encoded=False, **options):
+    """Build one sprite in memory and return {texture key: Pillow image},
+    or {texture key: PNG bytes} with encoded=True, with one key per
+    density ("player", "player@2x"). cfg defaults to SPRITES[name];
+    options are process_sprite()'s (cache, frames, scales, dedup, trim,
+    optimize, pre_reduce, ...). Nothing is printed or written outside the
+    caches. Raises RuntimeError if the sprite can't be built.
+    """
+    sink = MemorySink()
+    entries = {}
+    lines = []
+    ok = process_sprite(
+        name,
+        cfg or SPRITES[name],
+        resampling,
+        log=lines.append,
+        record=entries.__setitem__,
+        sink=sink,
+        **options,
+    )
+    if not ok:
+        raise RuntimeError("\n".join(line.strip() for line in lines))
+    files = {key: sink.files[entry["file"]] for key, entry in entries.items()}
+    if encoded:
+        return files
+    images = {}
+    for key, data in files.items():
+        images[key] = Image.open(io.BytesIO(data))
+        images[key].load()
+    return images
+
+
+def sprite_options(args):
+    """The CLI options that change what a sprite's outputs look like."""
+    return {
+        "resampling": args.resampling,
+        "scales": args.scales,
+        "pre_reduce": args.pre_reduce,
+        "optimize": args.optimize,
+        "chunked_png": chunked(args.png_threads),
+        "formats": args.formats,
+        "dedup": args.dedup,
+        "trim": args.trim,
+    }
+
+
+def sprite_inputs(name, options, state):
+    """Build-graph inputs of a sprite: its processing code, SPRITES entry,
+    options and the content of every source frame."""
+    cfg = SPRITES[name]
+    inputs = code_fingerprints(process_sprite)
+    inputs["config"] = options_digest(cfg)
+    inputs["options"] = options_digest(options)
+    src_dir = os.path.join(ROOT, cfg["src"])
+    for fname in cfg["frames"]:
+        path = os.path.join(src_dir, f"{fname}.png")
+        if os.path.isfile(path):
+            inputs[f"frame {fname}"] = state.source_digest(path)
+    return inputs
+
+
+def build(targets, args, resampling, cache, frames, budget, prof, jobs, sink, state=None, carried=None):
+    """Process targets, print their logs in order and update the manifest.
+    With a state, successful sprites are recorded in it; carried are the
+    manifest entries of up-to-date sprites."""
+    if state:
+        inputs = {name: sprite_inputs(name, sprite_options(args), state) for name in targets}
+    if jobs > 1 and targets:
+        # Sprites are orchestrated from threads (hashing, cache I/O, assembly
+        # and encode mostly release the GIL) while every frame decode+resize
+        # goes to one shared process pool, so a long strip like "player"
+        # spreads across cores as well as independent sprites do.
+        with ProcessPoolExecutor(max_workers=jobs) as pool, ThreadPoolExecutor(
+            max_workers=min(jobs, len(targets))
+        ) as threads:
+            futures = [
+                threads.submit(
+                    run_sprite,
+                    name,
+                    SPRITES[name],
+                    resampling,
+                    cache,
+                    pool,
+                    args.optimize,
+                    prof,
+                    args.pre_reduce,
+                    budget,
+                    frames,
+                    args.scales,
+                    args.dedup,
+                    args.trim,
+                    sink,
+                    args.png_threads,
+                    args.formats,
+                )
+                for name in targets
+            ]
+            results = [f.result() for f in futures]
+    else:
+        results = [
+            run_sprite(
+                name,
+                SPRITES[name],
+                resampling,
+                cache,
+                optimize=args.optimize,
+                prof=prof,
+                pre_reduce=args.pre_reduce,
+                frames=frames,
+                scales=args.scales,
+                dedup=args.dedup,
+                trim=args.trim,
+                sink=sink,
+                png_threads=args.png_threads,
+                formats=args.formats,
+            )
+            for name in targets
+        ]
+
+    # Report in target order regardless of completion order
+    ok = 0
+    entries = dict(carried or {})
+    dropped = []
+    for name, (success, lines, written) in zip(targets, results):
+        for line in lines:
+            print(line)
+        entries.update(written)
+        if success:
+            ok += 1
+            if state:
+                node = node_name("downscale", name, sink.root)
+                # Densities the last build wrote and this one didn't (--scales)
+                dropped.extend(key for key in state.entries(node) if key not in written)
+                state.record(node, inputs[name], sink.root, written)
+
+    if entries:
+        write_manifest(entries, sink, args.hashed, dropped)
+    if state and targets:
+        state.save()
+
+    if cache:
+        evicted = cache.prune()
+        if evicted:
+            print(f"  cache: evicted {evicted} entries")
+    if frames:
+        evicted = frames.prune()
+        if evicted:
+            print(f"  frame store: evicted {evicted} files")
+
+    if targets:
+        print(f"\nDone: {ok}/{len(targets)} sprites processed.")
+    else:
+        print("\nNothing to do: every sprite is up to date.")
+
+
+# ─── Watch mode ──────────────────────────────────────────────────────
+# Source folders are polled (a stat per frame, no extra dependency) and a
+# sprite is rebuilt once its frames have stopped changing for the debounce
+# interval, so a burst of saves or a folder copy rebuilds it only once.
+
+
+def source_state(cfg):
+    """{frame path: (mtime_ns, size)} for the sprite's frames that exist."""
+    state = {}
+    src_dir = os.path.join(ROOT, cfg["src"])
+    for fname in cfg["frames"]:
+        path = os.path.join(src_dir, f"{fname}.png")
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        state[path] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def watch(targets, build, poll=0.1, debounce=0.2):
+    """Call build([sprite names]) whenever those sprites' source frames
+    change, until interrupted."""
+    states = {name: source_state(SPRITES[name]) for name in targets}
+    changed = {}  # sprite -> when its frames last changed
+    print(f"\nWatching {len(targets)} sprite(s) for changes (Ctrl+C to stop)...")
+    while True:
+        time.sleep(poll)
+        now = time.monotonic()
+        for name in targets:
+            state = source_state(SPRITES[name])
+            if state != states[name]:
+                states[name] = state
+                changed[name] = now
+        ready = [name for name in targets if name in changed and now - changed[name] >= debounce]
+        if ready:
+            for name in ready:
+                del changed[name]
+            build(ready)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Downscale hi-res assets to game resolution")
     parser.add_argument("sprites", nargs="*", help="Sprite names to process (default: all)")
@@ -153,9 +1044,123 @@ def main():
         default="lanczos",
         help="Resampling filter (default: lanczos)",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help="Resize cache location (default: .cache/downscale)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=512,
+        help="Evict least recently used cache entries above this size (default: 512)",
+    )
+    parser.add_argument(
+        "--frames-max-mb",
+        type=float,
+        default=2048,
+        help="Size cap for the decoded frame store in .cache/frames (default: 2048)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Disable the resize cache and frame store")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Worker processes for decoding/resizing (0 = all cores, default: 1)",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Write indexed/size-optimized PNGs and report bytes saved",
+    )
+    parser.add_argument(
+        "--png-threads",
+        type=int,
+        default=1,
+        help="Deflate large outputs in chunks on this many threads (0 = all cores, default: 1)",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=VARIANT_FORMATS,
+        default=[],
+        help="Also write lossless variants in these formats where smaller than the PNG; the manifest lists them",
+    )
+    parser.add_argument(
+        "--max-memory-mb",
+        type=float,
+        help="With --jobs, cap the estimated memory of source frames being decoded at once",
+    )
+    parser.add_argument(
+        "--scales",
+        type=float,
+        nargs="+",
+        help="Densities to write for every sprite, e.g. 0.5 1 2 (default: each sprite's scales, else 1)",
+    )
+    parser.add_argument(
+        "--pre-reduce",
+        action="store_true",
+        help="Box-reduce big frames before resampling: faster, but not the same pixels "
+        "(about 3 levels per channel on average, up to 65 on hard edges). JPEG sources "
+        "also decode at reduced size, but only with --no-cache: the frame store holds full-size frames",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Store identical strip frames once; the manifest gets a frame remap",
+    )
+    parser.add_argument(
+        "--trim",
+        action="store_true",
+        help="Crop single images to their opaque bounds; the manifest gets the offsets",
+    )
+    parser.add_argument(
+        "--hashed",
+        action="store_true",
+        help="Also write content-hashed copies (name.<hash>.png) of every output",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every sprite and stage and print a summary table",
+    )
+    parser.add_argument("--trace", metavar="FILE", help="Also write a Chrome trace-event JSON (implies --profile)")
+    parser.add_argument("--out", help="Output folder, .zip, .tar or .tar.gz (default: apps/web/public/assets)")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="List the sprites that would be processed and why, then exit",
+    )
+    parser.add_argument("--force", action="store_true", help="Process every selected sprite, even if up to date")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild sprites whose source frames change (decodes in this process)",
+    )
+    parser.add_argument(
+        "--debounce-ms",
+        type=float,
+        default=200,
+        help="With --watch, wait until frames are unchanged this long before rebuilding (default: 200)",
+    )
+    parser.add_argument(
+        "--lru-mb",
+        type=float,
+        default=512,
+        help="With --watch, decoded source frames kept in memory (default: 512)",
+    )
     args = parser.parse_args()
 
     resampling = RESAMPLING_METHODS[args.resampling]
+    args.png_threads = args.png_threads or os.cpu_count() or 1
+    args.formats, unsupported = supported_formats(args.formats)
+    for fmt in unsupported:
+        print(f"  WARN this Pillow build cannot write {fmt}; skipping it")
+    cache = frames = None
+    if not args.no_cache:
+        cache = ResizeCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+        frames = FrameStore(FRAMES_DIR, int(args.frames_max_mb * 1024 * 1024))
     targets = args.sprites or list(SPRITES.keys())
 
     unknown = [t for t in targets if t not in SPRITES]
@@ -164,13 +1169,75 @@ def main():
         print(f"Available: {', '.join(SPRITES.keys())}")
         sys.exit(1)
 
-    print(f"Downscaling assets (resampling={args.resampling})...")
-    ok = 0
+    archive = bool(args.out) and is_archive(args.out)
+    if archive and (args.hashed or args.watch):
+        print("Error: --hashed and --watch need a folder to write into, not an archive")
+        sys.exit(1)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    if args.watch:
+        # Decoded frames have to stay in this process to be reused
+        frames = FrameLRU(int(args.lru_mb * 1024 * 1024), frames)
+        jobs = 1
+    budget = MemoryBudget(int(args.max_memory_mb * 1024 * 1024)) if args.max_memory_mb else None
+    prof = Profiler()
+    if args.profile or args.trace:
+        prof.start()
+
+    # Archives are written from scratch, so only folders build incrementally.
+    # Sprites without source art are always passed on, to report why.
+    missing = [name for name in targets if not os.path.isdir(os.path.join(ROOT, SPRITES[name]["src"]))]
+    state = None if archive else BuildState()
+    sink_root = args.out or ASSETS_DIR
+    if not state:
+        plan = {name: ["writing an archive"] for name in targets}
+    elif args.force:
+        plan = {name: ["--force"] for name in targets}
+    else:
+        options = sprite_options(args)
+        plan = {
+            name: state.stale(node_name("downscale", name, sink_root), sprite_inputs(name, options, state))
+            for name in targets
+        }
+    for name in missing:
+        plan[name] = ["source folder not found"]
+    if args.dry_run:
+        print("Build plan (dry run):")
+        print_plan({name: plan[name] for name in targets if name not in missing}, "sprite(s)")
+        for name in missing:
+            print(f"  skip {name}: source folder not found")
+        return
+    sink = open_sink(args.out) if args.out else DirectorySink(ASSETS_DIR)
+
+    carried = {}
     for name in targets:
-        if process_sprite(name, SPRITES[name], resampling):
-            ok += 1
+        if not plan[name]:
+            carried.update(state.entries(node_name("downscale", name, sink_root)))
+    stale = [name for name in targets if plan[name]]
+
+    print(f"Downscaling assets (resampling={args.resampling})...")
+    if len(stale) < len(targets):
+        print(f"  up to date: {len(targets) - len(stale)} sprite(s) (--force to reprocess)")
+    build(stale, args, resampling, cache, frames, budget, prof, jobs, sink, state, carried)
+
+    if args.watch:
+
+        def rebuild(names):
+            start = time.perf_counter()
+            print(f"\nChanged: {', '.join(names)}")
+            build(names, args, resampling, cache, frames, budget, prof, jobs, sink, state)
+            print(f"  rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        try:
+            watch(targets, rebuild, debounce=args.debounce_ms / 1000)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+    sink.close()
 
-    print(f"\nDone: {ok}/{len(targets)} sprites processed.")
+    if prof.enabled:
+        print_summary(prof.events)
+        if args.trace:
+            write_trace(prof.events, args.trace, "downscale_assets")
 
 
 if __name__ == "__main__":
@@ -2,13 +2,117 @@
 """
 Generate all pixel-art assets for Solana Survivors.
 16-bit style, top-down view, PNG with transparency.
+
+Usage:
+    python generate_assets.py                   # generate everything
+    python generate_assets.py enemies/swarm     # generate a single asset
+    python generate_assets.py "enemies/*"       # names and globs over output paths
+    python generate_assets.py --jobs 8          # run generators in 8 worker processes
+    python generate_assets.py --list            # show registered generators
+    python generate_assets.py --optimize        # palette-quantized, size-optimized PNGs
+    python generate_assets.py --png-threads 4   # deflate big sheets on 4 threads
+    python generate_assets.py --formats webp avif   # plus lossless WebP/AVIF where smaller
+    python generate_assets.py --profile --trace trace.json   # per-stage timings + trace
+    python generate_assets.py --hashed          # also write content-hashed copies for the CDN
+    python generate_assets.py --dedup           # store repeated sheet frames once (remap in manifest)
+    python generate_assets.py --trim            # crop transparent borders (offsets in manifest)
+    python generate_assets.py --native          # no baked upscale; draw scale in manifest
+    python generate_assets.py --out build/assets.zip   # write into a folder, .zip or .tar(.gz)
+    python generate_assets.py --dry-run         # list what is stale and why, write nothing
+    python generate_assets.py --force           # redraw everything, stale or not
+
+Only generators whose code (or a helper it uses), options or outputs
+changed since the last run are redrawn; see asset_graph.py. Generators
+whose output downscale_assets.py builds from source art (assets-src/player)
+are skipped, so each file has one owner.
+
+From Python, generate(name) returns a generator's outputs in memory:
+
+    from generate_assets import generate
+    images = generate("enemies/swarm")                  # {"enemies/swarm.png": Image}
+    pngs = generate("player", encoded=True, native=True)  # {"player/player.png": bytes}
+
+Every run records what it wrote in assets/manifest.json (see asset_manifest.py).
 """
 
+import argparse
+import contextlib
+import io
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+
+import numpy as np
 from PIL import Image, ImageDraw
 
+import downscale_assets
+from asset_graph import BuildState, code_fingerprints, node_name, options_digest, print_plan
+from asset_manifest import make_entry, variant_path, write_manifest
+from asset_profile import Profiler, image_bytes, print_summary, write_trace
+from asset_sinks import DirectorySink, MemorySink, is_archive, open_sink
+from optimize_png import (
+    VARIANT_FORMATS,
+    chunked,
+    describe_saving,
+    describe_variants,
+    encode,
+    supported_formats,
+    variants,
+)
+from pixel_canvas import stencil
+from sprite_frames import dedup_frames, integer_upscale, join_strip, split_sheet, trim_image
+
 BASE = os.path.join(os.path.dirname(__file__), "apps", "web", "public", "assets")
 
+# Set per run by main() / run_generator(); read by save()
+SAVE_OPTIONS = {
+    "optimize": False,
+    "dedup": False,
+    "trim": False,
+    "native": False,
+    "png_threads": 1,
+    "formats": [],
+}
+
+# Enabled by run_generator() under --profile; save() records its stages here
+PROFILER = Profiler()
+
+# Manifest entries save() recorded during the current run_generator() call
+MANIFEST_ENTRIES = {}
+
+# Where save() writes (paths relative to BASE); see asset_sinks.py
+SINK = DirectorySink(BASE)
+
+# ─── Generator registry ────────────────────────────────────
+# name -> {"fn", "group", "outputs", "key", "frame", "frame_names"};
+# outputs are paths relative to BASE. The name is the first output without
+# its extension, e.g. "enemies/swarm"; the CLI also matches the bare
+# basename ("swarm") and the output paths. key is the Phaser texture key
+# BootScene loads the output under (defaults to the basename), frame is
+# (w, h) for spritesheets and frame_names names their frames (idle_0, ...)
+# for the manifest's animation ranges.
+
+GENERATORS = {}
+
+
+def generator(group, *outputs, key=None, frame=None, frame_names=None):
+    """Register a generate_* function and the file(s) it writes under BASE."""
+
+    def register(fn):
+        name = os.path.splitext(outputs[0])[0]
+        GENERATORS[name] = {
+            "fn": fn,
+            "group": group,
+            "outputs": list(outputs),
+            "key": key or name.rsplit("/", 1)[-1],
+            "frame": frame,
+            "frame_names": frame_names,
+        }
+        return fn
+
+    return register
+
 
 def hex_to_rgb(h):
     h = h.lstrip("#")
@@ -23,11 +127,68 @@ def lighten(rgb, factor=1.4):
     return tuple(min(255, int(c * factor)) for c in rgb)
 
 
-def save(img, *path_parts):
-    fp = os.path.join(BASE, *path_parts)
-    os.makedirs(os.path.dirname(fp), exist_ok=True)
-    img.save(fp)
-    print(f"  Created {fp} ({img.width}x{img.height})")
+def save(img, *path_parts, scale=1):
+    """Write img to SINK under BASE. Art drawn small for a scale x upscale is
+    replicated up to full size, or with --native written as drawn and
+    its scale recorded in the manifest for the client to apply."""
+    # Profile under the generator name (its first output without extension)
+    item = os.path.splitext(os.path.join(*path_parts))[0]
+    gen = GENERATORS.get(item)
+    frame = gen["frame"] if gen else None
+    if scale != 1:
+        if SAVE_OPTIONS["native"]:
+            frame = frame and (frame[0] // scale, frame[1] // scale)
+        else:
+            with PROFILER.stage(item, "upscale"):
+                img = integer_upscale(img, scale)
+            scale = 1
+    remap = None
+    if SAVE_OPTIONS["dedup"] and frame:
+        with PROFILER.stage(item, "dedup"):
+            cells, remap = dedup_frames(split_sheet(img, frame))
+            if len(cells) < len(remap):
+                img = join_strip(cells)
+                print(f"  {item}: {len(remap) - len(cells)} duplicate frame(s) removed")
+    trim = None
+    if SAVE_OPTIONS["trim"] and not frame:
+        # Sheets keep their grid; pack_atlas.py trims their cells
+        with PROFILER.stage(item, "trim"):
+            img, trim = trim_image(img)
+        if img.size == tuple(trim[2:]):
+            trim = None
+    with PROFILER.stage(item, "encode") as st:
+        data, plain = encode(img, SAVE_OPTIONS["optimize"], SAVE_OPTIONS["png_threads"])
+        st["bytes"] += image_bytes(img) + len(data)
+    kept = {}
+    if SAVE_OPTIONS["formats"]:
+        with PROFILER.stage(item, "variants"):
+            kept = variants(img, len(data), SAVE_OPTIONS["formats"], SAVE_OPTIONS["optimize"])
+    rel = os.path.join(*path_parts)
+    fp = SINK.location(rel)
+    with PROFILER.stage(item, "write"):
+        SINK.write(rel, data)
+        for fmt, variant in kept.items():
+            SINK.write(variant_path(rel, fmt), variant)
+    key = gen["key"] if gen else os.path.basename(item)
+    MANIFEST_ENTRIES[key] = make_entry(
+        rel,
+        data,
+        img.size,
+        "generate_assets",
+        frame,
+        gen["frame_names"] if gen else None,
+        remap=remap,
+        trim=trim,
+        scale=scale,
+        variants=kept,
+    )
+    notes = f", trimmed from {trim[2]}x{trim[3]}" if trim else ""
+    notes += f", draw at {scale}x" if scale != 1 else ""
+    notes += f", {describe_variants(kept, len(data))}" if kept else ""
+    if SAVE_OPTIONS["optimize"]:
+        print(f"  Created {fp} ({img.width}x{img.height}{notes}, {describe_saving(len(data), plain)})")
+    else:
+        print(f"  Created {fp} ({img.width}x{img.height}{notes})")
 
 
 # ─── Helpers ───────────────────────────────────────────────
@@ -44,19 +205,26 @@ def fill_rect(draw, x, y, w, h, color):
     draw.rectangle([x, y, x + w - 1, y + h - 1], fill=color)
 
 
+def new_image(width, height, fill=(0, 0, 0, 0)):
+    """Blank RGBA image and its ImageDraw, as (img, draw)."""
+    img = Image.new("RGBA", (width, height), fill)
+    return img, ImageDraw.Draw(img)
+
+
 # ─── 1. PLAYER SPRITESHEET ────────────────────────────────
 
 
+# Same frames as the source art downscale_assets.py builds the sheet from
+@generator("Player", "player/player.png", frame=(128, 128), frame_names=downscale_assets.SPRITES["player"]["frames"])
 def generate_player():
-    """1024x128 spritesheet: 8 frames of 128x128 (4 idle + 4 walk). Drawn at 32x32 then upscaled."""
+    """1024x128 spritesheet: 8 frames of 128x128 (4 idle + 4 walk). Drawn at 32x32 then upscaled
+    (or, with --native, written at 256x32 to be drawn at 4x)."""
     DRAW_W, DRAW_H = 32, 32
     W, H = 128, 128
     FRAMES = 8
     # Draw at 32x32 then upscale to 128x128
-    small_img = Image.new("RGBA", (DRAW_W * FRAMES, DRAW_H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(small_img)
+    small_img, draw = new_image(DRAW_W * FRAMES, DRAW_H)
     img = small_img  # draw references use img, will upscale at end
-    draw = ImageDraw.Draw(img)
 
     blue = hex_to_rgb("#3399ff")
     blue_light = hex_to_rgb("#66bbff")
@@ -69,10 +237,7 @@ def generate_player():
     def draw_player_frame(ox, oy_offset=0, walk_phase=0):
         """Draw one player frame at offset ox. oy_offset for idle bob. walk_phase 0-3 for walk."""
         # Shadow
-        for sx in range(12, 21):
-            for sy in range(27 + oy_offset, 30 + oy_offset):
-                if 13 <= sx <= 19 and sy == 28 + oy_offset:
-                    draw.point((ox + sx, sy), fill=(0, 0, 0, 60))
+        fill_rect(draw, ox + 13, 28 + oy_offset, 7, 1, (0, 0, 0, 60))
 
         base_y = 4 + oy_offset
 
@@ -165,11 +330,12 @@ def generate_player():
         )  # boot
 
         # Outline - subtle border for contrast
-        # We'll add key outline pixels
-        for px in range(12, 22):
-            if img.getpixel((ox + px, base_y + 1))[3] > 0:
-                if base_y > 0 and img.getpixel((ox + px, base_y))[3] == 0:
-                    draw.point((ox + px, base_y), fill=blue_light + (120,))
+        # Key outline pixels: empty pixels directly above the hood's top row
+        if base_y > 0:
+            alpha = np.asarray(img)[base_y : base_y + 2, ox + 12 : ox + 22, 3]
+            xs = np.nonzero((alpha[1] > 0) & (alpha[0] == 0))[0] + ox + 12
+            if len(xs):
+                draw.point([(x, base_y) for x in xs.tolist()], fill=blue_light + (120,))
 
     # Idle frames 0-3: subtle breathing animation
     bobs = [0, 0, -1, -1]
@@ -180,24 +346,15 @@ def generate_player():
     for i in range(4):
         draw_player_frame((i + 4) * DRAW_W, oy_offset=0, walk_phase=i)
 
-    # Upscale from 256x32 to 1024x128 (nearest neighbor for pixel art)
-    final_img = small_img.resize((W * FRAMES, H), Image.NEAREST)
-    save(final_img, "player", "player.png")
+    # 256x32 -> 1024x128 by pixel replication, unless written native
+    save(small_img, "player", "player.png", scale=W // DRAW_W)
 
 
 # ─── 2. ENEMIES ───────────────────────────────────────────
 
 
-def generate_swarm():
-    """24x24 basic insect/slime enemy."""
-    img = Image.new("RGBA", (24, 24), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    green = hex_to_rgb("#44cc44")
-    green_l = hex_to_rgb("#66ee66")
-    green_d = darken(green)
-
-    # Body - blob shape
-    body_pixels = [
+SWARM_BODY = stencil(
+    [
         "        xxxxxx        ",
         "      xxxxxxxxxx      ",
         "     xxxxxxxxxxxx     ",
@@ -210,16 +367,21 @@ def generate_swarm():
         "      xxxxxxxx       ",
         "       xxxxxx        ",
         "        xxxx         ",
-    ]
-    for ry, row in enumerate(body_pixels):
-        y = 6 + ry
-        for rx, ch in enumerate(row):
-            x = 1 + rx
-            if x < 24:
-                if ch == "x":
-                    draw.point((x, y), fill=green)
-                elif ch == "X":
-                    draw.point((x, y), fill=green_l)
+    ],
+    {"x": "body", "X": "highlight"},
+)
+
+
+@generator("Enemies", "enemies/swarm.png", key="enemy-swarm")
+def generate_swarm():
+    """24x24 basic insect/slime enemy."""
+    img, draw = new_image(24, 24)
+    green = hex_to_rgb("#44cc44")
+    green_l = hex_to_rgb("#66ee66")
+    green_d = darken(green)
+
+    # Body - blob shape
+    SWARM_BODY.blit(img, 1, 6, {"body": green, "highlight": green_l})
 
     # Simplified approach - draw a slime blob
     # Main body ellipse
@@ -246,10 +408,10 @@ def generate_swarm():
     save(img, "enemies", "swarm.png")
 
 
+@generator("Enemies", "enemies/fast.png", key="enemy-fast")
 def generate_fast():
     """20x20 fast wasp-like enemy."""
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(20, 20)
     yellow = hex_to_rgb("#cccc44")
     yellow_l = lighten(yellow)
     yellow_d = darken(yellow)
@@ -282,10 +444,10 @@ def generate_fast():
     save(img, "enemies", "fast.png")
 
 
+@generator("Enemies", "enemies/tank.png", key="enemy-tank")
 def generate_tank():
     """36x36 heavy golem enemy."""
-    img = Image.new("RGBA", (36, 36), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(36, 36)
     red = hex_to_rgb("#cc4444")
     red_l = hex_to_rgb("#ee6666")
     red_d = darken(red)
@@ -331,10 +493,10 @@ def generate_tank():
     save(img, "enemies", "tank.png")
 
 
+@generator("Enemies", "enemies/ranged.png", key="enemy-ranged")
 def generate_ranged():
     """24x24 ranged mage enemy."""
-    img = Image.new("RGBA", (24, 24), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(24, 24)
     purple = hex_to_rgb("#aa44cc")
     purple_l = hex_to_rgb("#cc66ee")
     purple_d = darken(purple)
@@ -373,10 +535,10 @@ def generate_ranged():
     save(img, "enemies", "ranged.png")
 
 
+@generator("Enemies", "enemies/exploder.png", key="enemy-exploder")
 def generate_exploder():
     """28x28 bomb-like suicide enemy."""
-    img = Image.new("RGBA", (28, 28), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(28, 28)
     orange = hex_to_rgb("#cc8844")
     orange_l = hex_to_rgb("#ffaa66")
     orange_d = darken(orange)
@@ -421,10 +583,10 @@ def generate_exploder():
     save(img, "enemies", "exploder.png")
 
 
+@generator("Enemies", "enemies/elite.png", key="enemy-elite")
 def generate_elite():
     """32x32 elite enemy with ethereal look."""
-    img = Image.new("RGBA", (32, 32), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(32, 32)
     white = (255, 255, 255)
     silver = hex_to_rgb("#ccccdd")
     silver_l = hex_to_rgb("#eeeeff")
@@ -481,10 +643,10 @@ def generate_elite():
     save(img, "enemies", "elite.png")
 
 
+@generator("Enemies", "enemies/boss.png", key="enemy-boss")
 def generate_boss():
     """80x80 boss enemy - demonic dragon top-down."""
-    img = Image.new("RGBA", (80, 80), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(80, 80)
     crimson = hex_to_rgb("#dc143c")
     red_border = hex_to_rgb("#ff4444")
     dark_red = darken(crimson)
@@ -608,10 +770,10 @@ def generate_boss():
 # ─── 3. PROJECTILES ───────────────────────────────────────
 
 
+@generator("Projectiles", "projectiles/magic-bolt.png", key="proj-magic-bolt")
 def generate_magic_bolt():
     """10x10 blue magic bolt."""
-    img = Image.new("RGBA", (10, 10), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(10, 10)
     blue = hex_to_rgb("#44aaff")
     blue_l = (150, 200, 255)
     white = (255, 255, 255)
@@ -632,10 +794,10 @@ def generate_magic_bolt():
     save(img, "projectiles", "magic-bolt.png")
 
 
+@generator("Projectiles", "projectiles/knife.png", key="proj-knife")
 def generate_knife():
     """16x8 knife pointing right."""
-    img = Image.new("RGBA", (16, 8), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(16, 8)
     silver = hex_to_rgb("#cccccc")
     silver_l = hex_to_rgb("#eeeeee")
     silver_d = hex_to_rgb("#999999")
@@ -659,10 +821,10 @@ def generate_knife():
     save(img, "projectiles", "knife.png")
 
 
+@generator("Projectiles", "projectiles/bomb.png", key="proj-bomb")
 def generate_bomb():
     """12x12 classic bomb."""
-    img = Image.new("RGBA", (12, 12), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(12, 12)
     red = hex_to_rgb("#ff4444")
     dark = (30, 30, 30)
     gray = (80, 80, 80)
@@ -684,10 +846,10 @@ def generate_bomb():
     save(img, "projectiles", "bomb.png")
 
 
+@generator("Projectiles", "projectiles/drone-bullet.png", key="proj-drone-bullet")
 def generate_drone_bullet():
     """10x10 cyan energy bullet."""
-    img = Image.new("RGBA", (10, 10), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(10, 10)
     cyan = hex_to_rgb("#44ccff")
     cyan_l = (150, 240, 255)
     white = (255, 255, 255)
@@ -707,10 +869,10 @@ def generate_drone_bullet():
     save(img, "projectiles", "drone-bullet.png")
 
 
+@generator("Projectiles", "projectiles/enemy-bullet.png", key="proj-enemy-bullet")
 def generate_enemy_bullet():
     """10x10 hostile pink-red bullet."""
-    img = Image.new("RGBA", (10, 10), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(10, 10)
     pink = hex_to_rgb("#ff4466")
     pink_l = (255, 150, 170)
     dark = (100, 0, 20)
@@ -736,10 +898,10 @@ def generate_enemy_bullet():
 # ─── 4. EFFECTS ───────────────────────────────────────────
 
 
+@generator("Effects", "effects/orbit-orb.png")
 def generate_orbit_orb():
     """20x20 orange fire orb."""
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(20, 20)
     orange = hex_to_rgb("#ff8844")
     orange_l = hex_to_rgb("#ffaa66")
     yellow = hex_to_rgb("#ffdd44")
@@ -765,10 +927,10 @@ def generate_orbit_orb():
     save(img, "effects", "orbit-orb.png")
 
 
+@generator("Effects", "effects/drone.png")
 def generate_drone():
     """16x16 allied drone."""
-    img = Image.new("RGBA", (16, 16), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(16, 16)
     cyan = hex_to_rgb("#44ccff")
     cyan_l = hex_to_rgb("#88eeff")
     gray = hex_to_rgb("#888899")
@@ -803,12 +965,12 @@ def generate_drone():
     save(img, "effects", "drone.png")
 
 
+@generator("Effects", "effects/explosion.png", frame=(64, 64))
 def generate_explosion():
     """384x64 spritesheet: 6 frames of 64x64 explosion."""
     FW, FH = 64, 64
     FRAMES = 6
-    img = Image.new("RGBA", (FW * FRAMES, FH), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(FW * FRAMES, FH)
 
     yellow = hex_to_rgb("#ffdd44")
     orange = hex_to_rgb("#ff6600")
@@ -882,10 +1044,10 @@ def generate_explosion():
     save(img, "effects", "explosion.png")
 
 
+@generator("Effects", "effects/xp-gem.png")
 def generate_xp_gem():
     """12x12 diamond-shaped XP gem."""
-    img = Image.new("RGBA", (12, 12), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(12, 12)
     green_cyan = hex_to_rgb("#44ddaa")
     light = lighten(green_cyan)
     dark = darken(green_cyan)
@@ -915,6 +1077,7 @@ def generate_xp_gem():
 # ─── 5. WORLD ─────────────────────────────────────────────
 
 
+@generator("World", "world/ground-tile.png")
 def generate_ground_tile():
     """64x64 seamless dark ground tile."""
     bg = hex_to_rgb("#1a1a2e")
@@ -922,26 +1085,20 @@ def generate_ground_tile():
     detail = hex_to_rgb("#222240")
     accent = hex_to_rgb("#252545")
 
-    img = Image.new("RGBA", (64, 64), bg + (255,))
-    draw = ImageDraw.Draw(img)
+    img, draw = new_image(64, 64, bg + (255,))
 
     # Subtle stone/grid texture
     # Border lines (seamless - draw on both edges so they tile)
-    for i in range(64):
-        # Horizontal border at top and bottom edges
-        draw.point((i, 0), fill=border)
-        draw.point((i, 63), fill=border)
-        # Vertical border at left and right edges
-        draw.point((0, i), fill=border)
-        draw.point((63, i), fill=border)
+    fill_rect(draw, 0, 0, 64, 1, border)
+    fill_rect(draw, 0, 63, 64, 1, border)
+    fill_rect(draw, 0, 0, 1, 64, border)
+    fill_rect(draw, 63, 0, 1, 64, border)
 
     # Subtle grid pattern for stone tiles
     for x in range(0, 64, 16):
-        for y in range(64):
-            draw.point((x, y), fill=detail)
+        fill_rect(draw, x, 0, 1, 64, detail)
     for y in range(0, 64, 16):
-        for x in range(64):
-            draw.point((x, y), fill=detail)
+        fill_rect(draw, 0, y, 64, 1, detail)
 
     # Small decorative details scattered (symmetric for tiling)
     detail_points = [
@@ -962,16 +1119,13 @@ def generate_ground_tile():
         (40, 56),
         (56, 56),
     ]
-    for px, py in detail_points:
-        draw.point((px, py), fill=accent)
-        draw.point((px + 1, py), fill=accent)
-        draw.point((px, py + 1), fill=accent)
+    draw.point(
+        [(px + dx, py + dy) for px, py in detail_points for dx, dy in ((0, 0), (1, 0), (0, 1))],
+        fill=accent,
+    )
 
     # Central decorative dot (spec requirement)
-    draw.point((31, 31), fill=border)
-    draw.point((32, 31), fill=border)
-    draw.point((31, 32), fill=border)
-    draw.point((32, 32), fill=border)
+    fill_rect(draw, 31, 31, 2, 2, border)
 
     # Add some very subtle random-looking but tileable noise
     # Use symmetric patterns that repeat at tile boundaries
@@ -1009,9 +1163,7 @@ def generate_ground_tile():
         (35, 55),
         (51, 59),
     ]
-    for px, py in noise_spots:
-        if 0 <= px < 64 and 0 <= py < 64:
-            draw.point((px, py), fill=detail)
+    draw.point([(px, py) for px, py in noise_spots if 0 <= px < 64 and 0 <= py < 64], fill=detail)
 
     save(img, "world", "ground-tile.png")
 
@@ -1019,40 +1171,277 @@ def generate_ground_tile():
 # ─── MAIN ─────────────────────────────────────────────────
 
 
+def select_generators(patterns):
+    """Resolve names/globs to registry names, keeping registry order."""
+    if not patterns:
+        return list(GENERATORS), []
+    selected = set()
+    unknown = []
+    for pattern in patterns:
+        hits = [
+            name
+            for name, gen in GENERATORS.items()
+            if fnmatch(name, pattern)
+            or fnmatch(name.rsplit("/", 1)[-1], pattern)
+            or any(fnmatch(o, pattern) for o in gen["outputs"])
+        ]
+        if not hits:
+            unknown.append(pattern)
+        selected.update(hits)
+    return [name for name in GENERATORS if name in selected], unknown
+
+
+def generator_inputs(name, options):
+    """Build-graph inputs of a generator: fingerprints of its code and
+    everything it calls (save() included) plus the options it runs with."""
+    inputs = code_fingerprints(GENERATORS[name]["fn"])
+    saved = {k: options[k] for k in SAVE_OPTIONS if k != "png_threads"}
+    # Chunked PNGs are the same bytes however many threads deflate them
+    inputs["options"] = options_digest({**saved, "chunked_png": chunked(options["png_threads"])})
+    return inputs
+
+
+def run_generator(name, options=None):
+    """Run one generator, capturing its output so a failure stays local.
+
+    Returns (ok, output, profile events, manifest entries, files); events
+    is empty unless options["profile"] is set. With options["collect"]
+    (the location prefix to log) outputs go to a MemorySink instead of
+    SINK and files is its {path: bytes}, for worker processes and
+    generate(); otherwise files is empty.
+    """
+    global SINK
+    options = dict(options or {})
+    if options.pop("profile", False):
+        PROFILER.start()
+    collect = options.pop("collect", None)
+    PROFILER.events = []
+    MANIFEST_ENTRIES.clear()
+    SAVE_OPTIONS.update(options)
+    sink = SINK
+    if collect is not None:
+        SINK = MemorySink(collect)
+    buf = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buf), PROFILER.stage(name, "total"):
+            GENERATORS[name]["fn"]()
+        ok = True
+    except Exception as e:
+        buf.write(f"  FAIL {name}: {type(e).__name__}: {e}\n")
+        ok = False
+    finally:
+        files = SINK.files if collect is not None else {}
+        SINK = sink
+    return ok, buf.getvalue(), PROFILER.events, dict(MANIFEST_ENTRIES), files
+
+
+def generate(name, encoded=False, **options):
+    """Run one generator in memory and return {output path: Pillow image},
+    or {output path: PNG bytes} with encoded=True. name is matched as on
+    the command line ("enemies/swarm", "swarm", "player/player.png");
+    options are SAVE_OPTIONS keys (optimize=True, native=True,
+    dedup=True, ...). Nothing is printed or written. Raises KeyError
+    unless name picks exactly one generator, RuntimeError if it fails.
+    """
+    targets, _ = select_generators([name])
+    if len(targets) != 1:
+        raise KeyError(f"{name!r} matches {len(targets)} generators")
+    name = targets[0]
+    saved = dict(SAVE_OPTIONS)
+    try:
+        ok, output, _, _, files = run_generator(name, {**options, "collect": ""})
+    finally:
+        SAVE_OPTIONS.clear()
+        SAVE_OPTIONS.update(saved)
+    if not ok:
+        raise RuntimeError(output.strip())
+    if encoded:
+        return files
+    images = {}
+    for path, data in files.items():
+        images[path] = Image.open(io.BytesIO(data))
+        images[path].load()
+    return images
+
+
 def main():
+    global SINK
+    parser = argparse.ArgumentParser(description="Generate Solana Survivors pixel-art assets")
+    parser.add_argument("names", nargs="*", help="Generator names or globs (default: all)")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Worker processes (0 = all cores, default: 1)",
+    )
+    parser.add_argument("--list", action="store_true", help="List generators and exit")
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Write indexed/size-optimized PNGs and report bytes saved",
+    )
+    parser.add_argument(
+        "--png-threads",
+        type=int,
+        default=1,
+        help="Deflate large images in chunks on this many threads (0 = all cores, default: 1)",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=VARIANT_FORMATS,
+        default=[],
+        help="Also write lossless variants in these formats where smaller than the PNG; the manifest lists them",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Store identical spritesheet frames once; the manifest gets a frame remap",
+    )
+    parser.add_argument(
+        "--trim",
+        action="store_true",
+        help="Crop single images to their opaque bounds; the manifest gets the offsets",
+    )
+    parser.add_argument(
+        "--native",
+        action="store_true",
+        help="Write pixel art drawn small at native size; the manifest gets its draw scale",
+    )
+    parser.add_argument(
+        "--hashed",
+        action="store_true",
+        help="Also write content-hashed copies (name.<hash>.png) of every output",
+    )
+    parser.add_argument("--out", help="Output folder, .zip, .tar or .tar.gz (default: apps/web/public/assets)")
+    parser.add_argument("--dry-run", action="store_true", help="List the generators that would run and why, then exit")
+    parser.add_argument("--force", action="store_true", help="Run every selected generator, even if up to date")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every generator and stage and print a summary table",
+    )
+    parser.add_argument("--trace", metavar="FILE", help="Also write a Chrome trace-event JSON (implies --profile)")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, gen in GENERATORS.items():
+            print(f"{name:24} {gen['key']:18} {gen['group']:12} {', '.join(gen['outputs'])}")
+        return
+
+    targets, unknown = select_generators(args.names)
+    if unknown:
+        print(f"Error: no generator matches: {', '.join(unknown)}")
+        print(f"Available: {', '.join(GENERATORS)}")
+        sys.exit(1)
+    owned = downscale_assets.owned_outputs()
+    for name in targets:
+        srcs = [owned[o] for o in GENERATORS[name]["outputs"] if o in owned]
+        if srcs:
+            print(f"  SKIP {name}: downscale_assets.py builds it from {srcs[0]}")
+    targets = [name for name in targets if not any(o in owned for o in GENERATORS[name]["outputs"])]
+
+    archive = bool(args.out) and is_archive(args.out)
+    if args.hashed and archive:
+        print("Error: --hashed needs a folder to write into, not an archive")
+        sys.exit(1)
+
+    formats, unsupported = supported_formats(args.formats)
+    for fmt in unsupported:
+        print(f"  WARN this Pillow build cannot write {fmt}; skipping it")
+
+    jobs = args.jobs or os.cpu_count() or 1
+    profile = bool(args.profile or args.trace)
+    options = {
+        "optimize": args.optimize,
+        "dedup": args.dedup,
+        "trim": args.trim,
+        "native": args.native,
+        "png_threads": args.png_threads or os.cpu_count() or 1,
+        "formats": formats,
+        "profile": profile,
+    }
+
+    # Archives are written from scratch, so only folders build incrementally
+    state = BuildState()
+    root = args.out or BASE
+    inputs = {name: generator_inputs(name, options) for name in targets}
+    if archive:
+        plan = {name: ["writing an archive"] for name in targets}
+    elif args.force:
+        plan = {name: ["--force"] for name in targets}
+    else:
+        plan = {name: state.stale(node_name("generate", name, root), inputs[name]) for name in targets}
+    if args.dry_run:
+        print("Build plan (dry run):")
+        print_plan(plan, "asset(s)")
+        return
+    sink = open_sink(args.out) if args.out else SINK
+
+    # Up-to-date generators keep the manifest entries they last wrote
+    entries = {}
+    for name in targets:
+        if not plan[name]:
+            entries.update(state.entries(node_name("generate", name, root)))
+    up_to_date = len(targets)
+    targets = [name for name in targets if plan[name]]
+    up_to_date -= len(targets)
+
     print("Generating Solana Survivors assets...")
     print()
 
-    print("[1/7] Player")
-    generate_player()
-
-    print("[2/7] Enemies")
-    generate_swarm()
-    generate_fast()
-    generate_tank()
-    generate_ranged()
-    generate_exploder()
-    generate_elite()
-    generate_boss()
-
-    print("[3/7] Projectiles")
-    generate_magic_bolt()
-    generate_knife()
-    generate_bomb()
-    generate_drone_bullet()
-    generate_enemy_bullet()
-
-    print("[4/7] Effects")
-    generate_orbit_orb()
-    generate_drone()
-    generate_explosion()
-    generate_xp_gem()
-
-    print("[5/7] World")
-    generate_ground_tile()
+    if jobs > 1 and len(targets) > 1:
+        # Workers hand their files back and this process writes them, so
+        # every sink (an open archive included) works the same in parallel
+        options["collect"] = sink.location("")
+        with ProcessPoolExecutor(max_workers=min(jobs, len(targets))) as pool:
+            results = list(pool.map(run_generator, targets, [options] * len(targets)))
+        for *_, files in results:
+            for path, data in files.items():
+                sink.write(path, data)
+    else:
+        SINK = sink
+        results = [run_generator(name, options) for name in targets]
+
+    # Report grouped, in registry order, regardless of completion order
+    groups = list(dict.fromkeys(GENERATORS[name]["group"] for name in targets))
+    ok = 0
+    current = None
+    events = []
+    for name, (success, output, profiled, written, _) in zip(targets, results):
+        group = GENERATORS[name]["group"]
+        if group != current:
+            current = group
+            print(f"[{groups.index(group) + 1}/{len(groups)}] {group}")
+        print(output, end="")
+        events.extend(profiled)
+        entries.update(written)
+        if success:
+            ok += 1
+            if isinstance(sink, DirectorySink):
+                state.record(node_name("generate", name, root), inputs[name], root, written)
+
+    if entries:
+        write_manifest(entries, sink, args.hashed)
+    sink.close()
+    if targets and isinstance(sink, DirectorySink):
+        state.save()
 
     print()
-    print("All 18 assets generated!")
+    if up_to_date:
+        print(f"Up to date: {up_to_date} asset(s) (--force to redraw)")
+    if targets and ok == len(targets):
+        print(f"All {ok} assets generated!")
+    elif targets:
+        print(f"{ok}/{len(targets)} assets generated.")
+
+    if profile:
+        print_summary(events)
+        if args.trace:
+            write_trace(events, args.trace, "generate_assets")
+    if ok != len(targets):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Size-optimized, lossless PNG encoding for the asset scripts.
+
+Images with at most 256 exact RGBA colors are written as indexed PNGs
+(1/2/4/8-bit, alpha in tRNS); everything else as RGB/RGBA. Each candidate
+is filtered with every PNG row filter plus per-row adaptive selection and
+deflated with several zlib strategies and levels; the smallest stream wins.
+
+With threads > 1, images over a chunk (1 MiB of scanlines) are deflated
+pigz-style: the filtered scanlines are cut into row-aligned chunks that
+compress on separate threads (zlib releases the GIL), each primed with
+the 32 KiB before it so matches can still reach back across the cut.
+Every chunk but the last ends in a sync flush, which byte-aligns it, so
+the raw deflate streams simply concatenate into the one zlib stream of a
+single IDAT chunk. The price is some 35 bytes per chunk for the flush
+marker and the new block's Huffman tables: nothing on detailed art, up
+to about 0.7% on flat art that deflates 100:1 or more. Chunks have a
+fixed size, so the output is the same for any thread count above one.
+
+variants() adds lossless WebP and, where this Pillow build has it,
+AVIF encodings of an image. A variant is kept only if it is smaller than
+the PNG and decodes to exactly the same pixels; Pillow's AVIF encoder
+has no true lossless mode, so on pixel art AVIF usually fails that test.
+
+Usage:
+    python optimize_png.py apps/web/public/assets/enemies/*.png   # rewrite in place
+    python optimize_png.py --dry-run path/to/sheet.png             # report only
+    python optimize_png.py --threads 8 atlas-0.png                 # parallel deflate
+"""
+
+import argparse
+import io
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, features
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color types
+GRAY, RGB, INDEXED, GRAY_ALPHA, RGBA = 0, 2, 3, 4, 6
+
+FILTER_NONE, FILTER_SUB, FILTER_UP, FILTER_AVERAGE, FILTER_PAETH = range(5)
+ADAPTIVE = "adaptive"
+FILTERS = [FILTER_NONE, FILTER_SUB, FILTER_UP, FILTER_AVERAGE, FILTER_PAETH, ADAPTIVE]
+
+# Tried on the best filter after screening every filter with Z_RLE
+STRATEGIES = [zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED]
+LARGE_IMAGE = 512 * 512
+
+# Parallel deflate: uncompressed bytes per chunk, and the history each
+# chunk is primed with (deflate's whole window)
+CHUNK_SIZE = 1024 * 1024
+WINDOW = 32 * 1024
+# What a plain img.save() filters and deflates with: Pillow's adaptive
+# filter never tries Average. Unchunked, the stream is byte for byte its.
+PIL_ADAPTIVE = "pil-adaptive"
+PIL_LEVEL = 6
+PIL_STRATEGY = zlib.Z_FILTERED
+
+
+# ─── Raw scanlines ───────────────────────────────────────────────────
+
+
+def exact_palette(img, max_colors=256):
+    """Return (indices HxW uint8, [(r, g, b, a), ...]) or None if img has
+    more than max_colors distinct RGBA values. Translucent entries are
+    sorted first so the tRNS chunk can stop at the last one."""
+    rgba = np.asarray(img.convert("RGBA"))
+    if img.getcolors(max_colors) is None:
+        return None
+    packed = rgba.view(np.uint32).reshape(rgba.shape[:2])
+    colors, inverse = np.unique(packed, return_inverse=True)
+    entries = colors.view(np.uint8).reshape(-1, 4)
+    order = np.lexsort((np.arange(len(entries)), entries[:, 3] == 255))
+    remap = np.empty(len(order), np.uint8)
+    remap[order] = np.arange(len(order), dtype=np.uint8)
+    indices = remap[inverse.reshape(packed.shape)]
+    palette = [tuple(int(c) for c in entries[i]) for i in order]
+    return indices, palette
+
+
+def pack_bits(indices, bit_depth):
+    """Pack an HxW index array into rows of bit_depth-bit samples."""
+    if bit_depth == 8:
+        return indices
+    per_byte = 8 // bit_depth
+    h, w = indices.shape
+    padded = np.zeros((h, -(-w // per_byte) * per_byte), np.uint8)
+    padded[:, :w] = indices
+    groups = padded.reshape(h, -1, per_byte)
+    out = np.zeros(groups.shape[:2], np.uint8)
+    for i in range(per_byte):
+        out |= groups[:, :, i] << (8 - bit_depth * (i + 1))
+    return out
+
+
+def candidates(img):
+    """Yield (color_type, bit_depth, rows HxN uint8, bpp, extra_chunks)."""
+    rgba = np.asarray(img.convert("RGBA"))
+    opaque = bool((rgba[:, :, 3] == 255).all())
+
+    pal = exact_palette(img)
+    if pal is not None:
+        indices, palette = pal
+        n = len(palette)
+        bit_depth = 1 if n <= 2 else 2 if n <= 4 else 4 if n <= 16 else 8
+        chunks = [(b"PLTE", bytes(c for entry in palette for c in entry[:3]))]
+        alphas = [entry[3] for entry in palette if entry[3] < 255]
+        if alphas:
+            chunks.append((b"tRNS", bytes(alphas)))
+        yield INDEXED, bit_depth, pack_bits(indices, bit_depth), 1, chunks
+
+    if opaque:
+        yield RGB, 8, rgba[:, :, :3].reshape(rgba.shape[0], -1), 3, []
+    else:
+        yield RGBA, 8, rgba.reshape(rgba.shape[0], -1), 4, []
+
+
+# ─── Filtering ───────────────────────────────────────────────────────
+# Every predictor only looks at unfiltered bytes, so whole images filter
+# in a handful of array operations.
+
+
+def filter_rows(rows, bpp, filter_type, prior=None, threads=1):
+    """Return PNG-filtered scanlines (filter byte + data per row) as bytes.
+
+    prior is the unfiltered row above rows[0], if any. Rows only depend on
+    the one above, so with threads > 1 blocks of rows filter in parallel.
+    """
+    step = max(1, CHUNK_SIZE // rows.shape[1])
+    if threads > 1 and rows.shape[0] > step:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            blocks = pool.map(
+                lambda top: filter_rows(rows[top : top + step], bpp, filter_type, rows[top - 1] if top else prior),
+                range(0, rows.shape[0], step),
+            )
+            return b"".join(blocks)
+
+    raw = rows.astype(np.int16)
+    left = np.zeros_like(raw)
+    left[:, bpp:] = raw[:, :-bpp]
+    up = np.zeros_like(raw)
+    up[1:] = raw[:-1]
+    if prior is not None:
+        up[0] = prior
+    upleft = np.zeros_like(raw)
+    upleft[:, bpp:] = up[:, :-bpp]
+
+    p = left + up - upleft
+    pa, pb, pc = np.abs(p - left), np.abs(p - up), np.abs(p - upleft)
+    paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upleft))
+
+    predicted = [
+        np.zeros_like(raw),
+        left,
+        up,
+        (left + up) >> 1,
+        paeth,
+    ]
+    filtered = np.stack([(raw - pred).astype(np.uint8) for pred in predicted])
+
+    h = rows.shape[0]
+    if filter_type in (ADAPTIVE, PIL_ADAPTIVE):
+        # libpng heuristic: minimum sum of absolute signed residuals per row
+        cost = np.abs(filtered.view(np.int8).astype(np.int32)).sum(axis=2)
+        if filter_type == PIL_ADAPTIVE:
+            cost[FILTER_AVERAGE] = np.iinfo(np.int32).max
+        types = cost.argmin(axis=0).astype(np.uint8)
+    else:
+        types = np.full(h, filter_type, np.uint8)
+    data = filtered[types, np.arange(h)]
+    return np.concatenate([types[:, None], data], axis=1).tobytes()
+
+
+# ─── Container ───────────────────────────────────────────────────────
+
+
+def chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+def deflate(data, level=9, strategy=zlib.Z_DEFAULT_STRATEGY, threads=1, row_bytes=1):
+    """zlib stream of data; with threads > 1 and more than one chunk of
+    data, compressed in row-aligned chunks in parallel."""
+    size = max(row_bytes, CHUNK_SIZE // row_bytes * row_bytes)
+    if threads <= 1 or len(data) <= size:
+        c = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+        return c.compress(data) + c.flush()
+
+    view = memoryview(data)
+    starts = range(0, len(data), size)
+
+    def part(start):
+        # Raw deflate (wbits -15): the zlib header and checksum are ours
+        zdict = bytes(view[max(0, start - WINDOW) : start])
+        if zdict:
+            c = zlib.compressobj(level, zlib.DEFLATED, -15, 9, strategy, zdict)
+        else:
+            c = zlib.compressobj(level, zlib.DEFLATED, -15, 9, strategy)
+        last = start + size >= len(data)
+        return c.compress(view[start : start + size]) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        parts = list(pool.map(part, starts))
+    # Header as zlib writes it: 32K window, level hint, FCHECK to a multiple of 31
+    level = 6 if level == -1 else level
+    if strategy >= zlib.Z_HUFFMAN_ONLY or level < 2:
+        flevel = 0
+    else:
+        flevel = 1 if level < 6 else 2 if level == 6 else 3
+    cmf, flg = 0x78, flevel << 6
+    flg |= 31 - (cmf * 256 + flg) % 31
+    return bytes([cmf, flg]) + b"".join(parts) + struct.pack(">I", zlib.adler32(data))
+
+
+def build_png(width, height, bit_depth, color_type, idat, extra_chunks=()):
+    ihdr = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
+    out = [PNG_SIGNATURE, chunk(b"IHDR", ihdr)]
+    out.extend(chunk(tag, data) for tag, data in extra_chunks)
+    out.append(chunk(b"IDAT", idat))
+    out.append(chunk(b"IEND", b""))
+    return b"".join(out)
+
+
+def default_png(img):
+    """What a plain img.save(path) would write."""
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def chunked(threads):
+    """Whether encodes with threads workers deflate in chunks: their bytes
+    depend on this, not on the thread count, so caches key on it."""
+    return threads > 1
+
+
+def threaded_png(img, threads):
+    """The plain img.save() encode (Pillow's row filters and zlib settings)
+    with the deflate split across threads, so only the chunk restarts
+    differ; None for other modes and for images too small to split, which
+    img.save() handles as well."""
+    bpp = len(img.getbands())
+    if img.mode not in ("RGB", "RGBA") or img.width * img.height * bpp <= CHUNK_SIZE:
+        return None
+    rows = np.asarray(img).reshape(img.height, -1)
+    filtered = filter_rows(rows, bpp, PIL_ADAPTIVE, threads=threads)
+    idat = deflate(filtered, PIL_LEVEL, PIL_STRATEGY, threads, rows.shape[1] + 1)
+    return build_png(img.width, img.height, 8, RGBA if bpp == 4 else RGB, idat)
+
+
+def optimize(img, level=9, threads=1):
+    """Return the smallest lossless PNG encoding of img as bytes."""
+    # Above LARGE_IMAGE the non-RLE strategies run at level 6: at 9 they
+    # take seconds per megapixel for a percent or two.
+    slow_level = level if img.width * img.height <= LARGE_IMAGE else min(level, 6)
+    best = None
+    for color_type, bit_depth, rows, bpp, extra in candidates(img):
+        # Sub-byte indexed rows only compress well unfiltered
+        tries = [FILTER_NONE] if bit_depth < 8 else FILTERS
+        # Z_RLE is a small fraction of the cost of the other strategies and
+        # ranks row filters much the same, so it picks the filter to spend
+        # them on.
+        row_bytes = rows.shape[1] + 1
+        screened = []
+        for ftype in tries:
+            filtered = filter_rows(rows, bpp, ftype, threads=threads)
+            screened.append((deflate(filtered, level, zlib.Z_RLE, threads, row_bytes), filtered))
+        idat, filtered = min(screened, key=lambda s: len(s[0]))
+        streams = [idat] + [deflate(filtered, slow_level, strategy, threads, row_bytes) for strategy in STRATEGIES]
+        data = build_png(img.width, img.height, bit_depth, color_type, min(streams, key=len), extra)
+        if best is None or len(data) < len(best):
+            best = data
+    return best
+
+
+def encode(img, optimized=False, threads=1):
+    """Encode img as PNG. Returns (data, size a plain img.save() would be).
+
+    With threads > 1, images big enough to split are deflated in parallel
+    and the plain size is that of the threaded plain encode, at most about
+    0.7% over img.save() (see the module docstring).
+    """
+    plain = threaded_png(img, threads) if threads > 1 else None
+    if plain is None:
+        plain = default_png(img)
+    if not optimized:
+        return plain, len(plain)
+    data = optimize(img, threads=threads)
+    # Never ship something bigger than the plain encoder would have
+    return (data if len(data) < len(plain) else plain), len(plain)
+
+
+# ─── Other formats ───────────────────────────────────────────────────
+
+VARIANT_FORMATS = ["webp", "avif"]
+
+
+def supported_formats(formats):
+    """(usable, unsupported) split of the requested variant formats."""
+    usable = [fmt for fmt in formats if features.check(fmt)]
+    return usable, [fmt for fmt in formats if fmt not in usable]
+
+
+def encode_variant(img, fmt, optimized=False):
+    """Encode img as fmt ("webp" or "avif") at lossless settings."""
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA")
+    buf = io.BytesIO()
+    if fmt == "webp":
+        # exact keeps the color of fully transparent pixels
+        img.save(buf, "WEBP", lossless=True, quality=100, method=6 if optimized else 4, exact=True)
+    else:
+        img.save(buf, "AVIF", quality=100, subsampling="4:4:4", speed=2 if optimized else 6)
+    return buf.getvalue()
+
+
+def variants(img, png_size, formats, optimized=False):
+    """{format: bytes} for each of formats that encodes img losslessly in
+    fewer bytes than png_size; the others are dropped."""
+    kept = {}
+    pixels = None
+    for fmt in formats:
+        data = encode_variant(img, fmt, optimized)
+        if len(data) >= png_size:
+            continue
+        if pixels is None:
+            pixels = np.asarray(img.convert("RGBA"))
+        decoded = np.asarray(Image.open(io.BytesIO(data)).convert("RGBA"))
+        if np.array_equal(decoded, pixels):
+            kept[fmt] = data
+    return kept
+
+
+def describe_variants(kept, png_size):
+    return ", ".join(f"{fmt} {len(data)} B (-{100 * (1 - len(data) / png_size):.0f}%)" for fmt, data in kept.items())
+
+
+def write_png(img, path, optimized=False, threads=1):
+    """Write img to path. Returns (bytes written, plain save size)."""
+    data, plain_size = encode(img, optimized, threads)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data), plain_size
+
+
+def describe_saving(written, plain):
+    if written >= plain:
+        return f"{written} B"
+    return f"{written} B, -{plain - written} B ({100 * (plain - written) / plain:.0f}%)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Losslessly shrink PNG files")
+    parser.add_argument("paths", nargs="+", help="PNG files to optimize in place")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without writing")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Deflate large images in chunks on this many threads (0 = all cores, default: 1)",
+    )
+    args = parser.parse_args()
+    threads = args.threads or os.cpu_count() or 1
+
+    total_before = total_after = 0
+    for path in args.paths:
+        try:
+            img = Image.open(path)
+            img.load()
+        except OSError as e:
+            print(f"  SKIP {path}: {e}")
+            continue
+        before = os.path.getsize(path)
+        data = optimize(img, threads=threads)
+        # Round-trip check: the optimized file must decode to the same pixels
+        check = Image.open(io.BytesIO(data)).convert("RGBA")
+        if check.tobytes() != img.convert("RGBA").tobytes():
+            print(f"  FAIL {path}: optimized output does not round-trip")
+            sys.exit(1)
+        after = min(before, len(data))
+        if after < before and not args.dry_run:
+            with open(path, "wb") as f:
+                f.write(data)
+        total_before += before
+        total_after += after
+        print(f"  {path}: {describe_saving(after, before)}")
+
+    print(f"\nDone: {total_before} B -> {total_after} B.")
+
+
+if __name__ == "__main__":
+    main()
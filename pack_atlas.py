@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Pack the sprites written by generate_assets.py and downscale_assets.py into
+power-of-two texture atlas pages with Phaser JSON-hash frame data.
+
+Single images become one frame named after their texture key; spritesheets
+(player, explosion, ...) are split into frames named "<key>_<index>", so
+animations can use generateFrameNames(atlas, { prefix: "player_", end: 7 }).
+Sheets written with --dedup get a name per logical frame, following the
+manifest's remap to the stored cell.
+Each page is written as <name>-<n>.png + <name>-<n>.json and can be loaded
+with this.load.atlas(...). Frames are trimmed to their opaque bounds (the
+offsets go in spriteSourceSize/sourceSize, which Phaser applies when
+drawing; images already written with --trim keep their recorded offset
+and untrimmed size), and identical frames are packed once, every name
+that shows them pointing at the same rectangle. Frames of pixel art
+written at native size (--native) carry the manifest's integer "scale":
+their sizes and offsets are in native pixels, and the loader applies the
+scale (nearest filtering) as it would for the standalone texture.
+
+Usage:
+    python pack_atlas.py                        # pack everything into assets/atlas/
+    python pack_atlas.py "enemy-*" "proj-*"     # pack only matching texture keys
+    python pack_atlas.py --max-size 1024 --padding 1
+    python pack_atlas.py --no-dedup             # pack repeated frames separately
+    python pack_atlas.py --no-trim              # keep transparent borders
+    python pack_atlas.py --png-threads 8        # deflate pages on 8 threads
+"""
+
+import argparse
+import json
+import os
+import sys
+from fnmatch import fnmatch
+
+from PIL import Image
+
+import downscale_assets
+import generate_assets
+from asset_manifest import MANIFEST_PATH
+from optimize_png import write_png
+from sprite_frames import dedup_remap, frame_digest, split_sheet, trim_image
+
+ROOT = os.path.dirname(__file__)
+OUT_DIR = os.path.join(generate_assets.BASE, "atlas")
+
+
+# ─── Sources ─────────────────────────────────────────────────────────
+
+
+def atlas_sources():
+    """Texture key -> {"path", "frame"} for every output of both scripts.
+
+    downscale_assets wins when both scripts write the same file (player),
+    since its hi-res source art replaces the generated placeholder.
+    """
+    sources = {}
+    for gen in generate_assets.GENERATORS.values():
+        sources[gen["key"]] = {
+            "path": os.path.join(generate_assets.BASE, gen["outputs"][0]),
+            "frame": gen["frame"],
+        }
+    for name, cfg in downscale_assets.SPRITES.items():
+        size = cfg["frame_size"]
+        sources[name] = {
+            "path": os.path.join(downscale_assets.ROOT, cfg["dst"]),
+            "frame": (size, size) if cfg["layout"] == "strip" else None,
+        }
+
+    # The manifest knows the grid of what was actually written last, e.g.
+    # a sheet generated with --native has cells of frame / scale
+    try:
+        with open(MANIFEST_PATH) as f:
+            recorded = json.load(f).get("assets", {})
+    except (OSError, ValueError):
+        recorded = {}
+    for key, src in sources.items():
+        grid = recorded.get(key, {}).get("frame")
+        if src["frame"] and grid:
+            src["frame"] = (grid["width"], grid["height"])
+    return sources
+
+
+def split_frames(key, img, frame, recorded=None):
+    """Cut an image into atlas frames [(name, img, (x, y, source_w, source_h))],
+    img sitting at (x, y) in its untrimmed source_w x source_h frame.
+
+    Sheets give one frame per logical frame (the manifest's remap maps it
+    to its stored cell), anything else one frame placed where its manifest
+    entry (recorded) says it was trimmed from.
+    """
+    recorded = recorded or {}
+    if frame is None:
+        trim = recorded.get("spriteSourceSize", {})
+        source = recorded.get("sourceSize", {"w": img.width, "h": img.height})
+        return [(key, img, (trim.get("x", 0), trim.get("y", 0), source["w"], source["h"]))]
+    cells = split_sheet(img, frame)
+    remap = recorded.get("remap") or range(len(cells))
+    return [(f"{key}_{i}", cells[cell], (0, 0, *cells[cell].size)) for i, cell in enumerate(remap)]
+
+
+# ─── MaxRects bin packing ────────────────────────────────────────────
+# Best-short-side-fit MaxRects (Jukka Jylänki, "A Thousand Ways to Pack
+# the Bin"). Rectangles are (x, y, w, h) tuples.
+
+
+def _contains(a, b):
+    return b[0] >= a[0] and b[1] >= a[1] and b[0] + b[2] <= a[0] + a[2] and b[1] + b[3] <= a[1] + a[3]
+
+
+class MaxRectsBin:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+
+    def insert(self, w, h):
+        """Place a w x h rect, returning its (x, y) or None if it doesn't fit."""
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                leftover_w, leftover_h = fw - w, fh - h
+                score = (min(leftover_w, leftover_h), max(leftover_w, leftover_h))
+                if best_score is None or score < best_score:
+                    best, best_score = (fx, fy, w, h), score
+        if best is None:
+            return None
+        self._split(best)
+        return best[0], best[1]
+
+    def _split(self, used):
+        x, y, w, h = used
+        free = []
+        for f in self.free:
+            fx, fy, fw, fh = f
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                free.append(f)
+                continue
+            if x > fx:
+                free.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                free.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                free.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                free.append((fx, y + h, fw, fy + fh - y - h))
+        # Drop free rects fully covered by another (keep one of exact twins)
+        self.free = [
+            a
+            for i, a in enumerate(free)
+            if not any(i != j and _contains(b, a) and (a != b or j < i) for j, b in enumerate(free))
+        ]
+
+
+def next_pot(n):
+    p = 1
+    while p < n:
+        p <<= 1
+    return p
+
+
+def _pack_into(sizes, width, height):
+    """Pack every (w, h) into one bin, or return None if they don't all fit."""
+    bin_ = MaxRectsBin(width, height)
+    positions = []
+    for w, h in sizes:
+        pos = bin_.insert(w, h)
+        if pos is None:
+            return None
+        positions.append(pos)
+    return positions
+
+
+def pack(sizes, max_size, padding=0):
+    """Assign each (w, h) to a page. Returns (placements, page_sizes) where
+    placements[i] = (page, x, y) and every page is power-of-two sized.
+
+    Each rect reserves `padding` extra pixels right and below; the gap
+    after the last row/column may hang off the page edge.
+    """
+    for w, h in sizes:
+        if w > max_size or h > max_size:
+            raise ValueError(f"{w}x{h} frame does not fit in a {max_size}x{max_size} page")
+    sizes = [(w + padding, h + padding) for w, h in sizes]
+
+    # Biggest first gives MaxRects its best results
+    order = sorted(range(len(sizes)), key=lambda i: (max(sizes[i]), sizes[i][0] * sizes[i][1]), reverse=True)
+    ordered = [sizes[i] for i in order]
+
+    # Smallest single page that holds everything, trying w = 2h and w = h
+    area = sum(w * h for w, h in sizes)
+    side = min(max_size, next_pot(max(max(max(s) for s in sizes) - padding, int(area**0.5))))
+    while side <= max_size:
+        for pw, ph in ((side, side // 2), (side, side)):
+            if ph == 0:
+                continue
+            positions = _pack_into(ordered, pw + padding, ph + padding)
+            if positions is not None:
+                placements = [None] * len(sizes)
+                for i, (x, y) in zip(order, positions):
+                    placements[i] = (0, x, y)
+                return placements, [(pw, ph)]
+        side <<= 1
+
+    # Spill over several max-size pages, then shrink each to its used bounds
+    bins = []
+    placements = [None] * len(sizes)
+    for i, (w, h) in zip(order, ordered):
+        for page, bin_ in enumerate(bins):
+            pos = bin_.insert(w, h)
+            if pos is not None:
+                break
+        else:
+            bins.append(MaxRectsBin(max_size + padding, max_size + padding))
+            page = len(bins) - 1
+            pos = bins[page].insert(w, h)
+        placements[i] = (page, pos[0], pos[1])
+    page_sizes = []
+    for page in range(len(bins)):
+        used_w = max(x + sizes[i][0] for i, (p, x, _) in enumerate(placements) if p == page)
+        used_h = max(y + sizes[i][1] for i, (p, _, y) in enumerate(placements) if p == page)
+        page_sizes.append((next_pot(used_w - padding), next_pot(used_h - padding)))
+    return placements, page_sizes
+
+
+# ─── Atlas output ────────────────────────────────────────────────────
+
+
+def atlas_frame(x, y, w, h, source_w, source_h, offset=(0, 0), scale=1):
+    """One Phaser JSON-hash frame entry, plus "scale" for native-size art."""
+    entry = {
+        "frame": {"x": x, "y": y, "w": w, "h": h},
+        "rotated": False,
+        "trimmed": (w, h) != (source_w, source_h),
+        "spriteSourceSize": {"x": offset[0], "y": offset[1], "w": w, "h": h},
+        "sourceSize": {"w": source_w, "h": source_h},
+    }
+    if scale != 1:
+        entry["scale"] = scale
+    return entry
+
+
+def build_atlas(frames, max_size=2048, padding=2, dedup=True, trim=True, scales=None):
+    """Pack split_frames() output and return [(page_img, frames_dict)] per page.
+
+    With trim, only each frame's alpha bounding box is packed. With dedup,
+    identical (trimmed) images are packed once and share a rectangle.
+    scales maps the names of frames written at native size to their draw
+    scale.
+    """
+    scales = scales or {}
+    cells = []
+    for _, img, (x, y, source_w, source_h) in frames:
+        if trim:
+            img, (ox, oy, _, _) = trim_image(img)
+            x, y = x + ox, y + oy
+        cells.append((img, (x, y, source_w, source_h)))
+    if dedup:
+        unique, remap = dedup_remap([frame_digest(cell) for cell, _ in cells])
+    else:
+        unique, remap = list(range(len(frames))), list(range(len(frames)))
+    sizes = [cells[i][0].size for i in unique]
+    placements, page_sizes = pack(sizes, max_size, padding)
+    pages = [(Image.new("RGBA", size, (0, 0, 0, 0)), {}) for size in page_sizes]
+    for i, (page, x, y) in zip(unique, placements):
+        pages[page][0].paste(cells[i][0], (x, y))
+    for (name, *_), (cell, (ox, oy, source_w, source_h)), j in zip(frames, cells, remap):
+        page, x, y = placements[j]
+        pages[page][1][name] = atlas_frame(
+            x, y, cell.width, cell.height, source_w, source_h, (ox, oy), scales.get(name, 1)
+        )
+    return pages
+
+
+def write_atlas(pages, out_dir, name, png_threads=1):
+    os.makedirs(out_dir, exist_ok=True)
+    for i, (sheet, entries) in enumerate(pages):
+        image_name = f"{name}-{i}.png"
+        write_png(sheet, os.path.join(out_dir, image_name), threads=png_threads)
+        data = {
+            "frames": entries,
+            "meta": {
+                "app": "pack_atlas.py",
+                "version": "1.0",
+                "image": image_name,
+                "format": "RGBA8888",
+                "size": {"w": sheet.width, "h": sheet.height},
+                "scale": "1",
+            },
+        }
+        json_path = os.path.join(out_dir, f"{name}-{i}.json")
+        with open(json_path, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"  {json_path} ({sheet.width}x{sheet.height}, {len(entries)} frames)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack generated sprites into texture atlas pages")
+    parser.add_argument("keys", nargs="*", help="Texture keys or globs to pack (default: all)")
+    parser.add_argument("--out-dir", default=OUT_DIR, help="Output folder (default: assets/atlas)")
+    parser.add_argument("--name", default="atlas", help="Page basename (default: atlas)")
+    parser.add_argument("--max-size", type=int, default=2048, help="Max page side, power of two (default: 2048)")
+    parser.add_argument("--padding", type=int, default=2, help="Transparent gap between frames (default: 2)")
+    parser.add_argument("--no-dedup", action="store_true", help="Pack identical frames separately")
+    parser.add_argument("--no-trim", action="store_true", help="Keep each frame's transparent border")
+    parser.add_argument(
+        "--png-threads",
+        type=int,
+        default=1,
+        help="Deflate each page in chunks on this many threads (0 = all cores, default: 1)",
+    )
+    args = parser.parse_args()
+
+    if args.max_size != next_pot(args.max_size):
+        print(f"Error: --max-size must be a power of two, got {args.max_size}")
+        sys.exit(1)
+
+    sources = atlas_sources()
+    keys = [k for k in sources if not args.keys or any(fnmatch(k, p) for p in args.keys)]
+    if not keys:
+        print(f"Error: no texture key matches: {', '.join(args.keys)}")
+        print(f"Available: {', '.join(sources)}")
+        sys.exit(1)
+
+    try:
+        with open(MANIFEST_PATH) as f:
+            recorded = json.load(f).get("assets", {})
+    except (OSError, ValueError):
+        recorded = {}
+
+    print(f"Packing atlas (max-size={args.max_size}, padding={args.padding})...")
+    frames = []
+    scales = {}
+    for key in keys:
+        src = sources[key]
+        if not os.path.isfile(src["path"]):
+            print(f"  SKIP {key}: not built yet ({src['path']})")
+            continue
+        img = Image.open(src["path"]).convert("RGBA")
+        cells = split_frames(key, img, src["frame"], recorded.get(key))
+        too_big = [n for n, cell, _ in cells if max(cell.size) > args.max_size]
+        if too_big:
+            print(f"  SKIP {key}: frame larger than {args.max_size}px")
+            continue
+        frames.extend(cells)
+        scale = recorded.get(key, {}).get("scale", 1)
+        scales.update((name, scale) for name, *_ in cells if scale != 1)
+
+    if not frames:
+        print("Error: nothing to pack")
+        sys.exit(1)
+
+    pages = build_atlas(
+        frames, args.max_size, args.padding, dedup=not args.no_dedup, trim=not args.no_trim, scales=scales
+    )
+    write_atlas(pages, args.out_dir, args.name, args.png_threads or os.cpu_count() or 1)
+    stored = sum(len({(e["frame"]["x"], e["frame"]["y"]) for e in entries.values()}) for _, entries in pages)
+    print(f"\nDone: {len(frames)} frames ({stored} distinct) on {len(pages)} page(s).")
+
+
+if __name__ == "__main__":
+    main()
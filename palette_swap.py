@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Produce recolored sprite variants (elite tints, NFT skins, seasonal
+events) without re-running the generators.
+
+Each base sprite's colors are indexed once into a uint8 index buffer plus
+a palette. A skin is a transform of that palette; it is baked into a
+256-entry RGBA lookup table, and every variant is a single gather of the
+index buffer through its table. Many skins go through one stacked gather.
+
+Usage:
+    python palette_swap.py enemy-swarm --skins frost infernal
+    python palette_swap.py "enemy-*" --skins elite     # globs over texture keys
+    python palette_swap.py enemy-tank --random 500 --seed 7 --sheet
+    python palette_swap.py apps/web/public/assets/test/nftboss.png --skins shadow
+"""
+
+import argparse
+import os
+import random
+import sys
+from fnmatch import fnmatch
+
+import numpy as np
+from PIL import Image
+
+from generate_assets import hex_to_rgb
+from pack_atlas import atlas_sources
+
+# ─── Skin definitions ────────────────────────────────────────────────
+# hue:        degrees to rotate every color around the HSV wheel
+# saturation: multiplier on HSV saturation
+# value:      multiplier on HSV value (brightness)
+# swap:       exact base color -> replacement, applied after the shift
+
+SKINS = {
+    "elite": {"hue": 0, "saturation": 0.35, "value": 1.25},
+    "frost": {"hue": 160, "saturation": 0.8, "value": 1.1},
+    "infernal": {"hue": -40, "saturation": 1.3, "value": 1.0},
+    "shadow": {"hue": 0, "saturation": 0.6, "value": 0.55},
+    "toxic": {"hue": 90, "saturation": 1.2, "value": 1.0},
+    "halloween": {"hue": 30, "saturation": 1.4, "value": 0.9},
+    "winter": {"hue": 190, "saturation": 0.5, "value": 1.3},
+}
+
+
+# ─── Indexing ────────────────────────────────────────────────────────
+
+
+def index_colors(img, max_colors=256):
+    """Return (indices HxW uint8, palette Nx4 uint8) for an RGBA image.
+
+    Exact when the image has at most max_colors colors, otherwise the image
+    is quantized first (downscaled hi-res art usually needs this).
+    """
+    img = img.convert("RGBA")
+    if img.getcolors(max_colors) is None:
+        img = img.quantize(max_colors, method=Image.Quantize.FASTOCTREE).convert("RGBA")
+    rgba = np.asarray(img)
+    packed = np.ascontiguousarray(rgba).view(np.uint32).reshape(rgba.shape[:2])
+    colors, inverse = np.unique(packed, return_inverse=True)
+    palette = colors.view(np.uint8).reshape(-1, 4)
+    return inverse.reshape(packed.shape).astype(np.uint8), palette
+
+
+# ─── Palette transforms ──────────────────────────────────────────────
+# Vectorized colorsys: every skin is applied to every palette entry in one
+# pass, so building thousands of lookup tables is a few array operations.
+
+
+def rgb_to_hsv(rgb):
+    """(..., 3) floats in [0, 1] -> (..., 3) HSV, same conventions as colorsys."""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maxc, minc = rgb.max(axis=-1), rgb.min(axis=-1)
+    delta = maxc - minc
+    s = np.where(maxc > 0, delta / np.where(maxc > 0, maxc, 1), 0.0)
+    d = np.where(delta > 0, delta, 1)
+    rc, gc, bc = (maxc - r) / d, (maxc - g) / d, (maxc - b) / d
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = np.where(delta > 0, (h / 6.0) % 1.0, 0.0)
+    return np.stack([h, s, maxc], axis=-1)
+
+
+def hsv_to_rgb(hsv):
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    i = np.floor(h * 6.0)
+    f = h * 6.0 - i
+    p, q, t = v * (1.0 - s), v * (1.0 - s * f), v * (1.0 - s * (1.0 - f))
+    i = i.astype(np.int64) % 6
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return np.stack([r, g, b], axis=-1)
+
+
+def build_luts(palette, skins):
+    """(V, 256, 4) RGBA lookup tables, one per skin, for an Nx4 palette.
+
+    Alpha and fully transparent entries are left untouched; swap maps are
+    matched against the base palette after the HSV shift.
+    """
+    skins = list(skins)
+    hue = np.array([[s.get("hue", 0) / 360.0] for s in skins])
+    sat = np.array([[s.get("saturation", 1.0)] for s in skins])
+    val = np.array([[s.get("value", 1.0)] for s in skins])
+
+    hsv = rgb_to_hsv(palette[:, :3].astype(np.float64) / 255.0)
+    h = (hsv[None, :, 0] + hue) % 1.0
+    s = np.minimum(1.0, hsv[None, :, 1] * sat)
+    v = np.minimum(1.0, hsv[None, :, 2] * val)
+    rgb = np.rint(hsv_to_rgb(np.stack([h, s, v], axis=-1)) * 255).astype(np.uint8)
+
+    luts = np.zeros((len(skins), 256, 4), np.uint8)
+    luts[:, : len(palette), :3] = np.where(palette[None, :, 3:4] == 0, palette[None, :, :3], rgb)
+    luts[:, : len(palette), 3] = palette[:, 3]
+    for i, skin in enumerate(skins):
+        for src, dst in skin.get("swap", {}).items():
+            hits = (palette[:, :3] == hex_to_rgb(src)).all(axis=1)
+            luts[i, : len(palette)][hits, :3] = hex_to_rgb(dst)
+    return luts
+
+
+def apply_luts(indices, luts):
+    """Render every skin at once: (V, 256, 4) tables -> (V, H, W, 4) pixels."""
+    return luts[:, indices]
+
+
+def random_skins(count, seed=0):
+    rng = random.Random(seed)
+    return {
+        f"r{i:04d}": {
+            "hue": rng.uniform(-180, 180),
+            "saturation": rng.uniform(0.5, 1.4),
+            "value": rng.uniform(0.7, 1.3),
+        }
+        for i in range(count)
+    }
+
+
+# ─── Output ──────────────────────────────────────────────────────────
+
+
+def variant_path(src_path, skin_name, out_dir=None):
+    base, ext = os.path.splitext(os.path.basename(src_path))
+    return os.path.join(out_dir or os.path.dirname(src_path), f"{base}-{skin_name}{ext}")
+
+
+def recolor(key, src, skins, out_dir=None, sheet=False, batch=64):
+    """Write one variant per skin (or one strip of all of them) for a sprite."""
+    img = Image.open(src["path"])
+    indices, palette = index_colors(img)
+    names = list(skins)
+    luts = build_luts(palette, skins.values())
+
+    if sheet:
+        # Skins side by side; skin i of a W-wide sprite starts at x = i * W
+        variants = apply_luts(indices, luts)
+        v, h, w, _ = variants.shape
+        strip = variants.transpose(1, 0, 2, 3).reshape(h, v * w, 4)
+        path = variant_path(src["path"], "skins", out_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.fromarray(strip).save(path)
+        print(f"  {key}: {path} ({len(names)} skins, {strip.shape[1]}x{strip.shape[0]})")
+        return
+
+    # Batches bound memory when big sprites meet thousands of skins
+    for start in range(0, len(names), batch):
+        variants = apply_luts(indices, luts[start : start + batch])
+        for name, pixels in zip(names[start : start + batch], variants):
+            path = variant_path(src["path"], name, out_dir)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            Image.fromarray(pixels).save(path)
+    print(f"  {key}: {len(names)} variant(s), {len(palette)} palette entries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recolor sprites through palette lookup tables")
+    parser.add_argument("keys", nargs="+", help="Texture keys, globs ('enemy-*') or PNG paths")
+    parser.add_argument("--skins", nargs="*", default=[], help=f"Named skins: {', '.join(SKINS)}")
+    parser.add_argument("--random", type=int, default=0, help="Add N random hue/sat/value skins")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --random (default: 0)")
+    parser.add_argument("--out-dir", help="Output folder (default: next to each source)")
+    parser.add_argument("--sheet", action="store_true", help="Write all skins of a sprite as one strip")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.skins if s not in SKINS]
+    if unknown:
+        print(f"Error: unknown skin(s): {', '.join(unknown)}")
+        print(f"Available: {', '.join(SKINS)}")
+        sys.exit(1)
+    skins = {name: SKINS[name] for name in args.skins}
+    skins.update(random_skins(args.random, args.seed))
+    if not skins:
+        print("Error: pass --skins and/or --random")
+        sys.exit(1)
+
+    sources = atlas_sources()
+    keys = [k for k in sources if any(fnmatch(k, p) for p in args.keys)]
+    # Art that isn't produced by either script (e.g. NFT skins) by path
+    for path in args.keys:
+        if os.path.isfile(path):
+            sources[path] = {"path": path, "frame": None}
+            keys.append(path)
+    if not keys:
+        print(f"Error: no texture key matches: {', '.join(args.keys)}")
+        print(f"Available: {', '.join(sources)}")
+        sys.exit(1)
+
+    print(f"Recoloring {len(keys)} sprite(s) x {len(skins)} skin(s)...")
+    for key in keys:
+        src = sources[key]
+        if not os.path.isfile(src["path"]):
+            print(f"  SKIP {key}: not built yet ({src['path']})")
+            continue
+        recolor(key, src, skins, args.out_dir, args.sheet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+ASCII-art stencils for generate_assets.py.
+
+Pixel art spelled out as rows of characters compiles once into an index
+array and is pasted in a single call, instead of one ImageDraw.point()
+per character.
+"""
+
+import hashlib
+
+import numpy as np
+from PIL import Image
+
+
+def rgba(color):
+    """Normalize an (r, g, b) or (r, g, b, a) color to an RGBA tuple."""
+    color = tuple(color)
+    return color + (255,) if len(color) == 3 else color
+
+
+# ─── ASCII stencils ───────────────────────────────────────
+# A stencil is a list of ASCII rows plus a legend mapping
+# characters to palette slot names, e.g. {"x": "body", "X": "highlight"}.
+# Characters not in the legend are transparent. Rows compile once into a
+# uint8 index array (0 = transparent, n = slot n-1); rendering with a
+# palette is a single lookup-table gather, so re-rendering the same shape
+# in other colors costs one array op.
+
+_STENCILS = {}
+
+
+class Stencil:
+    def __init__(self, rows, legend):
+        self.slots = list(dict.fromkeys(legend.values()))
+        width = max(len(row) for row in rows)
+        codes = np.zeros(256, np.uint8)
+        for ch, slot in legend.items():
+            codes[ord(ch)] = self.slots.index(slot) + 1
+        grid = np.frombuffer("".join(row.ljust(width) for row in rows).encode("latin-1"), np.uint8)
+        self.index = codes[grid].reshape(len(rows), width)
+
+    @property
+    def width(self):
+        return self.index.shape[1]
+
+    @property
+    def height(self):
+        return self.index.shape[0]
+
+    def lut(self, palette):
+        """(slots + 1) x 4 color table; slots missing from palette stay clear."""
+        table = np.zeros((len(self.slots) + 1, 4), np.uint8)
+        for i, slot in enumerate(self.slots):
+            if slot in palette:
+                table[i + 1] = rgba(palette[slot])
+        return table
+
+    def render(self, palette):
+        """Return (RGBA array, mask) of the stencil painted with palette."""
+        present = np.array([False] + [slot in palette for slot in self.slots])
+        return self.lut(palette)[self.index], present[self.index]
+
+    def blit(self, img, x, y, palette):
+        """Paint onto a Pillow image with its top-left at (x, y)."""
+        pixels, mask = self.render(palette)
+        # A 255 paste mask replaces pixels, matching ImageDraw semantics
+        img.paste(Image.fromarray(pixels), (x, y), Image.fromarray(mask.astype(np.uint8) * 255))
+
+
+def stencil(rows, legend):
+    """Compile ASCII rows into a Stencil, memoized by content hash."""
+    key = hashlib.sha1(repr((list(rows), sorted(legend.items()))).encode()).hexdigest()
+    compiled = _STENCILS.get(key)
+    if compiled is None:
+        compiled = _STENCILS[key] = Stencil(rows, legend)
+    return compiled
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Frame-level helpers shared by the asset scripts and pack_atlas.py:
+cutting spritesheets into cells, collapsing identical frames and trimming
+transparent borders.
+
+A deduplicated strip stores each distinct frame once, left to right in
+order of first use, plus a remap list: remap[i] is the stored cell that
+logical frame i shows. Animations keep their logical frame numbers and
+the loader looks each one up through the remap.
+
+A trimmed frame keeps only its alpha bounding box plus the (x, y) of that
+box in the original and the original size, i.e. TexturePacker's
+spriteSourceSize/sourceSize, so it can be drawn exactly where it was.
+
+Usage (standalone PNGs):
+    python sprite_frames.py apps/web/public/assets/test/*.png --out-dir trimmed
+    python sprite_frames.py boss.png --out-dir trimmed --json trimmed/offsets.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+
+def split_sheet(img, frame):
+    """Cut img into frame-sized (w, h) cells, row by row."""
+    fw, fh = frame
+    cols, rows = img.width // fw, img.height // fh
+    return [
+        img.crop((col * fw, row * fh, (col + 1) * fw, (row + 1) * fh))
+        for row in range(rows)
+        for col in range(cols)
+    ]
+
+
+def frame_digest(img):
+    """Hash of a frame's mode, size and pixels."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{img.mode}{img.size}".encode())
+    h.update(img.tobytes())
+    return h.digest()
+
+
+def dedup_remap(digests):
+    """(unique indices, remap) for a list of frame digests: unique[j] is
+    the first logical frame with stored cell j, remap[i] the cell of i."""
+    cells = {}
+    unique = []
+    remap = []
+    for i, digest in enumerate(digests):
+        if digest not in cells:
+            cells[digest] = len(unique)
+            unique.append(i)
+        remap.append(cells[digest])
+    return unique, remap
+
+
+def dedup_frames(frames):
+    """([distinct frames], remap) for a list of images."""
+    unique, remap = dedup_remap([frame_digest(f) for f in frames])
+    return [frames[i] for i in unique], remap
+
+
+def integer_upscale(img, factor):
+    """Scale img up by an integer factor by replicating every pixel into a
+    factor x factor block (what NEAREST does at integer ratios, minus the
+    resampler)."""
+    if factor == 1:
+        return img
+    pixels = np.asarray(img)
+    return Image.fromarray(pixels.repeat(factor, axis=0).repeat(factor, axis=1), img.mode)
+
+
+def join_strip(frames):
+    """Paste equally sized frames side by side into one RGBA strip."""
+    fw, fh = frames[0].size
+    strip = Image.new("RGBA", (fw * len(frames), fh), (0, 0, 0, 0))
+    for i, frame in enumerate(frames):
+        strip.paste(frame, (i * fw, 0))
+    return strip
+
+
+# ─── Trimming ────────────────────────────────────────────────────────
+
+
+def alpha_bbox(img, threshold=0):
+    """(x0, y0, x1, y1) of the pixels with alpha > threshold (exclusive
+    end), or None if there are none."""
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    solid = np.asarray(img)[:, :, 3] > threshold
+    rows = np.flatnonzero(solid.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(solid.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def trim_image(img, threshold=0):
+    """Crop img to its alpha bounding box.
+
+    Returns (trimmed, (x, y, source_w, source_h)). A fully transparent
+    image trims to its top-left pixel.
+    """
+    box = alpha_bbox(img, threshold) or (0, 0, 1, 1)
+    return img.crop(box), (box[0], box[1], img.width, img.height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim transparent borders off PNGs")
+    parser.add_argument("paths", nargs="+", help="PNG files to trim")
+    parser.add_argument("--out-dir", required=True, help="Where to write the trimmed PNGs")
+    parser.add_argument("--json", help="Write {file: spriteSourceSize/sourceSize} offsets here")
+    parser.add_argument("--threshold", type=int, default=0, help="Alpha at or below this is empty (default: 0)")
+    args = parser.parse_args()
+
+    offsets = {}
+    os.makedirs(args.out_dir, exist_ok=True)
+    for path in args.paths:
+        try:
+            img = Image.open(path).convert("RGBA")
+        except OSError as e:
+            print(f"  SKIP {path}: {e}")
+            continue
+        trimmed, (x, y, w, h) = trim_image(img, args.threshold)
+        out = os.path.join(args.out_dir, os.path.basename(path))
+        if os.path.abspath(out) == os.path.abspath(path):
+            print(f"Error: {out} would overwrite its source")
+            sys.exit(1)
+        trimmed.save(out)
+        offsets[os.path.basename(path)] = {
+            "spriteSourceSize": {"x": x, "y": y, "w": trimmed.width, "h": trimmed.height},
+            "sourceSize": {"w": w, "h": h},
+        }
+        saved = 100 * (1 - (trimmed.width * trimmed.height) / (w * h))
+        print(f"  {out}: {w}x{h} -> {trimmed.width}x{trimmed.height} at ({x}, {y}), -{saved:.0f}% pixels")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(offsets, f, indent=2)
+        print(f"\nOffsets written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Build-graph fingerprints: python -m pytest test_asset_graph.py"""
+
+import glob
+import os
+import sys
+
+import pytest
+
+import asset_graph
+import downscale_assets
+import generate_assets
+from asset_graph import BuildState, _own_print, code_fingerprints
+from pixel_canvas import stencil
+
+NODE = "generate_assets:enemies/swarm@test"
+
+
+@pytest.fixture(autouse=True)
+def fresh_prints():
+    # _own_print() keeps the values it saw: a build only fingerprints once
+    _own_print.cache_clear()
+    yield
+    _own_print.cache_clear()
+
+
+def swarm_inputs():
+    _own_print.cache_clear()
+    return generate_assets.generator_inputs("enemies/swarm", generate_assets.SAVE_OPTIONS)
+
+
+def edit_swarm(monkeypatch):
+    """Swap SWARM_BODY for the same art with one feeler pixel removed."""
+    art = [
+        "        xxxxxx        ",
+        "      xxxxxxxxxx      ",
+        "     xxxxxxxxxxxx     ",
+        "    xxxxXXxxxxxxxx    ",
+        "   xxxxXXXxxxxxxxxx   ",
+        "   xxxXXXxxxxxxxxxx   ",
+        "   xxxxxxxxxxxxxx     ",
+        "    xxxxxxxxxxxx xx   ",
+        "     xxxxxxxxxx  x   ",
+        "      xxxxxxxx       ",
+        "       xxxxxx        ",
+        "        xxxx         ",
+    ]
+    monkeypatch.setattr(generate_assets, "SWARM_BODY", stencil(art, {"x": "body", "X": "highlight"}))
+
+
+def test_stencil_edit_rebuilds_asset(monkeypatch, tmp_path):
+    state = BuildState(str(tmp_path / "state.json"))
+    state.record(NODE, swarm_inputs(), str(tmp_path), {})
+    assert state.stale(NODE, swarm_inputs()) == []
+
+    edit_swarm(monkeypatch)
+    assert state.stale(NODE, swarm_inputs()) == ["changed: generate_assets.SWARM_BODY"]
+
+
+def test_stencil_fingerprint_covers_its_class():
+    prints = code_fingerprints(generate_assets.generate_swarm)
+    assert "generate_assets.SWARM_BODY" in prints
+    assert "pixel_canvas.Stencil" in prints
+
+
+def test_fingerprints_ignore_run_state():
+    # Compiling stencils fills pixel_canvas's cache; that must not make
+    # the next run look stale
+    before = swarm_inputs()
+    stencil(["x x", " x "], {"x": "body"})
+    assert swarm_inputs() == before
+
+
+def run_script(module, monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", [module.__file__, *args])
+    module.main()
+    return capsys.readouterr().out
+
+
+def test_scripts_in_turn_reach_a_no_op(monkeypatch, capsys, tmp_path):
+    # Both scripts write player/player.png; only one may own it, or each
+    # sees the other's write as a modified output and rebuilds forever
+    monkeypatch.setattr(asset_graph, "STATE_PATH", str(tmp_path / "state.json"))
+    out = str(tmp_path / "assets")
+    for _ in range(2):
+        run_script(generate_assets, monkeypatch, capsys, "--out", out)
+        run_script(downscale_assets, monkeypatch, capsys, "--out", out, "--no-cache", "player")
+    written = {path: os.stat(path).st_mtime_ns for path in glob.glob(os.path.join(out, "**", "*.png"), recursive=True)}
+
+    generated = run_script(generate_assets, monkeypatch, capsys, "--out", out)
+    assert "Up to date: 17 asset(s)" in generated and "generated" not in generated
+    assert "Nothing to do" in run_script(downscale_assets, monkeypatch, capsys, "--out", out, "--no-cache", "player")
+    assert {path: os.stat(path).st_mtime_ns for path in written} == written